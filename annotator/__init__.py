@@ -0,0 +1,53 @@
+import os
+
+import streamlit.components.v1 as components
+
+# Plain HTML/JS frontend, served as is: there is no build step
+_FRONTEND = os.path.join(os.path.dirname(os.path.abspath(__file__)), "frontend")
+
+_annotator = components.declare_component("annotator", path=_FRONTEND)
+
+
+def annotator(rows, flags, token, actions, text_column="text", prefetch=None, key=None):
+    """
+    Render a page of utterances, edited entirely in the browser with the keyboard.
+
+    Toggling a flag, editing a text or moving between rows does not rerun the app.
+    Edits are sent back as diffs of the cells changed since the last send: with the
+    page action when the annotator leaves the page, and with the "autosave" action
+    once typing pauses, so an interrupted page is not lost.
+
+    Hotkeys, outside a text field: Space plays/pauses the active row, 1-4 toggle its
+    flags, J/K or the arrows move between rows, Enter or E edits its text, N and B
+    go to the next and previous page. Inside a text field: Enter moves to the text
+    of the next row, Escape leaves the field, Alt+1-4 and Alt+P work as 1-4 and Space.
+
+    Args:
+        rows (list): One dict per row: ``index``, ``audio`` (URL), ``raw_text``,
+            ``text`` and ``flags`` (flag column -> bool).
+        flags (list): ``(column, label)`` of the four flags, in hotkey order.
+        token (str): Identifies the page shown. A render with the same token keeps
+            the edits in progress, a new token resets the component.
+        actions (list): The page actions offered, among "previous", "next" and "done".
+        text_column (str): The edited text column, also the placeholder of the
+            text fields.
+        prefetch (list): Audio URLs the browser preloads while the page is edited,
+            e.g. those of the next page.
+        key (str): The widget key. The iframe is kept while the key stays the same.
+
+    Returns:
+        dict: The last diff sent, or None: ``id`` (unique per send), ``token``,
+            ``action`` ("autosave" or a page action) and ``edits`` (row index ->
+            {column: value}, only the cells changed since the previous send).
+    """
+    return _annotator(
+        rows=rows,
+        flags=[{"column": column, "label": label} for column, label in flags],
+        token=token,
+        actions=list(actions),
+        text_column=text_column,
+        text_label=f"Edit {text_column}",
+        prefetch=list(prefetch or []),
+        key=key,
+        default=None,
+    )
@@ -0,0 +1,85 @@
+"""
+Benchmark of ``upload_csv_files`` on generated datasets.
+
+Runs the ingestion pipeline against the in-memory storage backend, so only the
+grouping, serialization and upload bookkeeping are measured, and prints the time
+and throughput for each dataset size.
+
+    python benchmarks/ingest.py
+    python benchmarks/ingest.py --rows 10000 100000 1000000 --group-size 50 --format parquet
+    python benchmarks/ingest.py --rows 1000000 --chunk-size 100000
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import MemoryStorage, set_storage, upload_csv_files  # noqa: E402
+
+
+def make_dataset(root, n_rows, val_fraction=0.2):
+    """Write a ``train.csv`` and ``val.csv`` with ``n_rows`` rows in total."""
+    ids = np.arange(n_rows)
+    df = pd.DataFrame(
+        {
+            "full_path": pd.Series(ids).map("/data/wavs/utt_{}.wav".format),
+            "text": pd.Series(ids).map("sentence number {}".format),
+        }
+    )
+    n_val = int(n_rows * val_fraction)
+    os.makedirs(root, exist_ok=True)
+    df.iloc[: n_rows - n_val].to_csv(os.path.join(root, "train.csv"), index=False)
+    df.iloc[n_rows - n_val :].to_csv(os.path.join(root, "val.csv"), index=False)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "--rows", type=int, nargs="+", default=[10_000, 100_000, 1_000_000]
+    )
+    parser.add_argument("--group-size", type=int, default=50)
+    parser.add_argument("--format", default="csv", choices=["csv", "parquet"])
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument(
+        "--chunk-size", type=int, default=None, help="Read the source CSVs in chunks."
+    )
+    args = parser.parse_args()
+
+    results = []
+    for n_rows in args.rows:
+        with tempfile.TemporaryDirectory() as tmp:
+            root = os.path.join(tmp, f"bench_{n_rows}")
+            make_dataset(root, n_rows)
+            storage = MemoryStorage()
+            set_storage(storage)
+
+            started = time.perf_counter()
+            upload_csv_files(
+                root,
+                args.group_size,
+                file_format=args.format,
+                max_workers=args.workers,
+                chunk_size=args.chunk_size,
+            )
+            elapsed = time.perf_counter() - started
+
+            n_files = sum(
+                1 for _ in storage.list_blobs(prefix=f"csv_files/bench_{n_rows}/")
+            )
+            results.append((n_rows, n_files, elapsed))
+
+    print()
+    print(f"{'rows':>10} {'files':>8} {'seconds':>9} {'rows/s':>12}")
+    for n_rows, n_files, elapsed in results:
+        print(f"{n_rows:>10} {n_files:>8} {elapsed:>9.2f} {n_rows / elapsed:>12.0f}")
+
+
+if __name__ == "__main__":
+    main()
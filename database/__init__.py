@@ -1,51 +1,115 @@
-import streamlit as st
-import firebase_admin
-from firebase_admin import credentials, storage
 import pandas as pd
+import numpy as np
 import os
 from uuid import uuid4
 import math
-from io import BytesIO, StringIO
-
-# from io import StringIO
-
-
-# serviceAccount = os.path.join(os.path.dirname(__file__), ".", "serviceAccount.json")
-
-storageBucket = st.secrets["storageBucket"]
-
-# Initialize Firebase Admin SDK
-# Check if the Firebase Admin SDK is already initialized
-if not firebase_admin._apps:
-    # Initialize Firebase Admin SDK
-    cred = credentials.Certificate(
-        {
-            "type": st.secrets["type"],
-            "project_id": st.secrets["project_id"],
-            "private_key_id": st.secrets["private_key_id"],
-            "private_key": st.secrets["private_key"],
-            "client_email": st.secrets["client_email"],
-            "client_id": st.secrets["client_id"],
-            "auth_uri": st.secrets["auth_uri"],
-            "token_uri": st.secrets["token_uri"],
-            "auth_provider_x509_cert_url": st.secrets["auth_provider_x509_cert_url"],
-            "client_x509_cert_url": st.secrets["client_x509_cert_url"],
-            "universe_domain": st.secrets["universe_domain"],
-        }
-    )
-    firebase_admin.initialize_app(cred, {"storageBucket": storageBucket})
+import tempfile
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from database.storage import (
+    BlobInfo,
+    StorageBackend,
+    FirebaseStorage,
+    LocalStorage,
+    MemoryStorage,
+    create_storage,
+    get_storage,
+    set_storage,
+    ConflictError,
+)
+from database.cache import BlobCache, get_blob_cache
+from database.catalog import DatasetCatalog, get_catalog
+from database.transfer import (
+    UploadCheckpoint,
+    TransferStats,
+    SyncPlan,
+    run_bounded,
+    ordered_map,
+    hash_files,
+    content_hashes,
+    file_hashes,
+    same_content,
+)
+from database.formats import (
+    SCHEMA,
+    FORMATS,
+    file_extension,
+    content_type,
+    format_of,
+    serialize_frame,
+    deserialize_frame,
+    FrameWriter,
+)
+from database.manifest import (
+    FLAG_COLUMNS,
+    read_manifest,
+    write_manifest,
+    update_manifest,
+    update_group,
+    group_entry,
+    group_entries,
+    empty_manifest,
+)
+from database.journal import (
+    EDITABLE_COLUMNS,
+    diff_group,
+    append_journal,
+    list_journal,
+    read_journal,
+    replay_journal,
+    journal_needs_compaction,
+)
+from database.save_queue import SaveQueue
+from database.autosave import AutosaveLog, get_autosave_log
+from database.audio_cache import AudioCache, audio_bucket_path, get_audio_cache
+
+# The storage backend ("firebase", "local" or "memory") is selected with the
+# STORAGE_BACKEND environment variable or the storage_backend secret, and is
+# only created on first use, so importing this package needs no live bucket.
+
+# Files above this size are uploaded in resumable chunks (must be a multiple of 256 KiB)
+RESUMABLE_CHUNK_SIZE = 8 * 1024 * 1024
+
+
+def upload_csv_files(
+    folder_path,
+    group_size,
+    sync=False,
+    dry_run=False,
+    file_format="csv",
+    max_workers=8,
+    chunk_size=None,
+    merge=False,
+):
+    """
+    Upload CSV files from a local folder to Firebase Storage after modifying them.
 
-# Get a reference to the Firebase Storage bucket
-bucket = storage.bucket()
+    Group numbers are computed in one vectorized pass, the groups are split with a
+    single ``groupby``, and the group files are serialized and uploaded concurrently.
 
+    With ``chunk_size`` the source CSVs are read in chunks instead of whole, and
+    every group is uploaded as soon as it is complete (see
+    ``upload_csv_files_chunked``), so memory does not grow with the dataset.
 
-def upload_csv_files(folder_path, group_size):
-    """
-    Upload CSV files from a local folder to Firebase Storage after modifying them.
+    With ``merge`` an existing dataset is updated instead of replaced (see
+    ``merge_csv_files``): edited and done groups are kept as they are and only new
+    rows are added, in new groups.
+
+    In sync mode the generated files are compared by MD5 with the files already
+    stored, fetched with a single listing, and only new or changed files are uploaded.
 
     Args:
         folder_path (str): The path of the local folder containing the CSV files.
         group_size (int): The size of each group for grouping CSV files.
+        sync (bool): Only upload files whose content differs from the bucket.
+        dry_run (bool): With ``sync``, only print what would be uploaded.
+        file_format (str): Storage format of the dataset files, "csv" or "parquet"
+            (typed columns, compressed, with column projection on read).
+        max_workers (int): The number of files serialized and uploaded concurrently.
+        chunk_size (int): Read the source CSVs this many rows at a time. None reads
+            them whole.
+        merge (bool): Merge the CSV files into the existing dataset, keeping the edits.
 
     Returns:
         None
@@ -55,77 +119,440 @@ def upload_csv_files(folder_path, group_size):
         ValueError: If the folder_path is None or invalid, or if group_size is not positive.
         IOError: If there are issues reading, modifying, or uploading the CSV files to Firebase Storage.
     """
+    if merge:
+        return merge_csv_files(
+            folder_path, group_size, dry_run=dry_run, max_workers=max_workers
+        )
+    if chunk_size:
+        return upload_csv_files_chunked(
+            folder_path,
+            group_size,
+            chunk_size,
+            sync=sync,
+            dry_run=dry_run,
+            file_format=file_format,
+            max_workers=max_workers,
+        )
     try:
         if not os.path.isdir(folder_path):
             raise FileNotFoundError(f"The folder path '{folder_path}' does not exist.")
+        if group_size <= 0:
+            raise ValueError("group_size must be positive.")
         # Get the parent folder name
         parent_folder_name = os.path.basename(folder_path)
         folder_name = f"{parent_folder_name}"
+        extension = file_extension(file_format)
 
         files = {}
 
-        # Iterate over the files in the folder
-        for file_name in os.listdir(folder_path):
-            if file_name.endswith(".csv"):
-                # Read the CSV file into a DataFrame
-                file_path = os.path.join(folder_path, file_name)
+        # Train rows come first, so they get the lowest group numbers
+        for file_name in sorted(
+            (name for name in os.listdir(folder_path) if name.endswith(".csv")),
+            key=lambda name: (name != "train.csv", name != "val.csv", name),
+        ):
+            # Read the CSV file into a DataFrame
+            file_path = os.path.join(folder_path, file_name)
 
-                df = pd.read_csv(file_path)
-                len_df = len(df)
-                # Add a new column to the DataFrame
-                df["audio_link"] = get_audio_link(df, "full_path", parent_folder_name)
-                df["raw_text"] = df["text"]  # Example data for the new column
+            df = add_edit_columns(pd.read_csv(file_path), parent_folder_name)
 
-                df["multi_speaker"] = [False] * len_df
-                df["loud_noise"] = [False] * len_df
-                df["unclear"] = [False] * len_df
-                df["incomplete_sentence"] = [False] * len_df
+            files[file_name] = df
+            print(f"len {file_name} : {len(df)}")
+        df_get_group, total_group = get_group(files, group_size)
 
-                df["edit_status"] = [False] * len_df
+        uploads = {}  # Bucket path -> CSV content to upload
+        upload_metadata = {}  # Bucket path -> custom metadata of the upload
 
-                files[file_name] = df
-                print(f"len {file_name} : {len(df)}")
-        df_get_group, total_group = get_group(files, group_size)
+        for df_key, df in files.items():
+            df["group"] = df_get_group[df_key]["group"].to_numpy()
 
-        group_data = {}  # Dictionary to accumulate data for each group
+        # One groupby over all rows instead of one filter per group and file
+        all_rows = pd.concat(
+            [files[key] for key in ["train.csv", "val.csv"] if key in files],
+            ignore_index=True,
+        )
+        group_frames = {
+            int(i): combined_df for i, combined_df in all_rows.groupby("group")
+        }
+        print(f"{folder_name} : {len(group_frames)} groups of up to {group_size} rows")
+
+        def group_path(i):
+            return f"csv_files/{folder_name}/group_{i}{extension}"
+
+        # Convert the groups into the dataset file format
+        for i, data in zip(
+            group_frames,
+            ordered_map(
+                lambda df: serialize_frame(df, file_format),
+                group_frames.values(),
+                max_workers=max_workers,
+            ),
+        ):
+            uploads[group_path(i)] = data
 
-        # Iterate over each file and accumulate data for each group
         for df_key, df in files.items():
-            df["group"] = df_get_group[df_key]
+            split_name = os.path.splitext(df_key)[0]
+            split_path = f"csv_files/{folder_name}/{split_name}{extension}"
+            uploads[split_path] = serialize_frame(df, file_format)
 
-            for i in range(total_group + 1):
-                df_group = df[df["group"] == i]
-                if not df_group.empty:
-                    group_data.setdefault(i, []).append(df_group)
+            # Lets exports get the split length without downloading the split
+            upload_metadata[split_path] = {"row_count": str(len(df))}
+
+        storage = get_storage()
+        remote = {
+            blob.name: blob
+            for blob in storage.list_blobs(prefix=f"csv_files/{folder_name}/")
+        }
 
-        # Now, upload the accumulated data for each group to Firebase Storage
-        for i, data_list in group_data.items():
-            # Concatenate all DataFrames in the list for the same group
-            combined_df = pd.concat(data_list)
+        if sync:
+            plan = SyncPlan(
+                {path: content_hashes(data) for path, data in uploads.items()},
+                remote,
+                {path: len(data) for path, data in uploads.items()},
+            )
+            print(f"{folder_name} : CSV sync: {plan.summary()}")
+            if dry_run:
+                return
+            uploads = {path: uploads[path] for path in plan.to_transfer}
+
+        # Upload the modified CSV content to Firebase Storage
+        infos = dict(remote)
+
+        def upload(bucket_path):
+            csv_content_bytes = uploads[bucket_path]
+            infos[bucket_path] = storage.write(
+                bucket_path,
+                csv_content_bytes,
+                content_type=content_type(file_format),
+                metadata=upload_metadata.get(bucket_path),
+            )
+            return len(csv_content_bytes)
 
-            print(f"group: {i}, len: {len(combined_df)}")
+        stats = run_bounded(
+            list(uploads), upload, max_workers=max_workers, progress_every=1000
+        )
+        print(f"{folder_name} : {stats.report()}")
+        if stats.failed:
+            raise IOError(
+                f"{len(stats.failed)} files could not be uploaded, manifest not updated."
+            )
 
-            # Convert the combined DataFrame back to a CSV string
-            modified_csv_content = combined_df.to_csv(index=False)
-            csv_content_bytes = modified_csv_content.encode()
+        written = {i for i in group_frames if group_path(i) in uploads}
 
-            # Upload the modified CSV content to Firebase Storage
-            blob = bucket.blob(f"csv_files/{folder_name}/group_{i}.csv")
-            blob.upload_from_string(csv_content_bytes, content_type="text/csv")
+        # Edits journaled against a replaced group file no longer apply
+        delete_group_journals(folder_name, written)
 
-        for df_key, df in files.items():
-            df["group"] = df_get_group[df_key]
-            # Convert the DataFrame back to a CSV string
-            modified_csv_content = df.to_csv(index=False)
-            csv_content_bytes = modified_csv_content.encode()
+        write_upload_manifest(
+            folder_name,
+            file_format,
+            {os.path.splitext(df_key)[0]: len(df) for df_key, df in files.items()},
+            group_entries(all_rows, {i: infos[group_path(i)] for i in group_frames}),
+            set(group_frames) - written,
+        )
+
+        # Only once the new files and the manifest are stored
+        delete_other_formats(remote, file_format)
+
+        # The dataset list and its files changed
+        get_catalog().invalidate(folder_name)
+
+        print("Upload csv files successfully !")
+
+    except Exception as e:
+        print("An error occurred:", e)
+
+
+def add_edit_columns(df, folder_name, token_index=None):
+    """
+    Add the audio link, raw text and editing columns to rows read from a source CSV.
+
+    Args:
+        df (DataFrame): The source rows, with "full_path" and "text" columns.
+        folder_name (str): Name of the folder where audio files are stored in the bucket.
+        token_index (dict): Audio file name -> download token, from
+            ``audio_token_index``. None lists the audio folder.
+
+    Returns:
+        DataFrame: ``df``, with the new columns.
+    """
+    # Add a new column to the DataFrame
+    df["audio_link"] = get_audio_link(
+        df, "full_path", folder_name, bulk=True, token_index=token_index
+    )
+    df["raw_text"] = df["text"]  # Example data for the new column
+
+    df["multi_speaker"] = False
+    df["loud_noise"] = False
+    df["unclear"] = False
+    df["incomplete_sentence"] = False
+
+    df["edit_status"] = False
+    return df
+
+
+def delete_group_journals(dataset, group_nums):
+    """
+    Delete the journal segments of groups whose file was replaced.
+
+    The journals of the whole dataset are found with a single listing.
+
+    Args:
+        dataset (str): The name of the dataset folder.
+        group_nums (set): The numbers of the replaced groups.
+    """
+    storage = get_storage()
+    prefix = f"journal_files/{dataset}/"
+    for segment in storage.list_blobs(prefix=prefix):
+        group_num = segment.name[len(prefix) :].split("/", 1)[0].split("_")[-1]
+        if group_num.isdigit() and int(group_num) in group_nums:
+            storage.delete(segment.name)
+
+
+def delete_other_formats(remote, file_format):
+    """
+    Delete the files of a dataset stored in another format than ``file_format``.
+
+    Called once the dataset was uploaded in its new format and its manifest
+    written, so a failed or dry run upload never loses the previous files.
+
+    Args:
+        remote (dict): Bucket path -> ``BlobInfo`` of the dataset files, as listed
+            before the upload.
+        file_format (str): The format the dataset was uploaded in.
+    """
+    storage = get_storage()
+    for bucket_path in remote:
+        if format_of(bucket_path) not in (None, file_format):
+            storage.delete(bucket_path)
+
+
+def write_upload_manifest(dataset, file_format, splits, entries, kept):
+    """
+    Write the manifest of a dataset once its files were uploaded.
+
+    Groups whose file was left as it is (``kept``, e.g. unchanged in sync mode) keep
+    their journal, so their manifest entry is kept too: its edit status and flag
+    counts are those of the group with its journal replayed, not of the source
+    rows. Such a group without a current entry gets one built from ``load_group``.
+    The manifest is written with ``update_manifest``, so a concurrent update of a
+    group entry, e.g. by ``editing_done``, is not overwritten.
+
+    Args:
+        dataset (str): The name of the dataset folder.
+        file_format (str): The storage format of the uploaded files.
+        splits (dict): Split name -> number of rows.
+        entries (dict): Group number (as a string) -> manifest entry built from the
+            source rows, with the generation and checksum of the stored group file.
+        kept (set): The numbers of the groups whose file was not uploaded.
+
+    Returns:
+        dict: The written manifest.
+    """
+
+    def current_entry(groups, group_num):
+        # The entry of a kept group, if it describes the stored group file
+        entry = groups.get(str(group_num))
+        if entry and entry.get("generation") == entries[str(group_num)]["generation"]:
+            return entry
+        return None
+
+    current, _ = read_manifest(dataset)
+    current_groups = (current or {}).get("groups") or {}
+    rebuilt = {}
+    for group_num in kept:
+        if current_entry(current_groups, group_num) is None:
+            df, _ = load_group(dataset, group_num, file_format)
+            if df is not None:
+                rebuilt[str(group_num)] = group_entry(
+                    df, previous=entries[str(group_num)]
+                )
+
+    def update(manifest):
+        groups = dict(entries)
+        for group_num in kept:
+            key = str(group_num)
+            groups[key] = (
+                current_entry(manifest.get("groups") or {}, group_num)
+                or rebuilt.get(key)
+                or groups[key]
+            )
+        manifest.clear()
+        manifest.update(empty_manifest())
+        manifest["format"] = file_format
+        manifest["splits"] = splits
+        manifest["groups"] = groups
+
+    return update_manifest(dataset, update)
+
+
+def upload_csv_files_chunked(
+    folder_path,
+    group_size,
+    chunk_size=100_000,
+    sync=False,
+    dry_run=False,
+    file_format="csv",
+    max_workers=8,
+):
+    """
+    Upload CSV files from a local folder to Firebase Storage, reading them in chunks.
+
+    ``train.csv`` and then ``val.csv`` are read ``chunk_size`` rows at a time. Group
+    numbers continue across chunks and from train into val, exactly as with
+    ``upload_csv_files``. Every group is uploaded as soon as its last row has been
+    read, while the rows of the still incomplete group are carried over to the next
+    chunk. The train and val files are written chunk by chunk to a temporary local
+    file and uploaded from there.
+
+    Peak memory is a chunk plus the groups waiting to be uploaded, whatever the size
+    of the dataset. Only the audio download token index and the manifest grow with it.
+
+    Args:
+        folder_path (str): The path of the local folder containing the CSV files.
+        group_size (int): The size of each group for grouping CSV files.
+        chunk_size (int): The number of source rows read at a time.
+        sync (bool): Only upload files whose content differs from the bucket.
+        dry_run (bool): With ``sync``, only print what would be uploaded.
+        file_format (str): Storage format of the dataset files, "csv" or "parquet".
+        max_workers (int): The number of files serialized and uploaded concurrently.
+
+    Returns:
+        None
+
+    Raises:
+        FileNotFoundError: If the specified folder path does not exist.
+        ValueError: If group_size or chunk_size is not positive.
+        IOError: If there are issues reading or uploading the files.
+    """
+    try:
+        if not os.path.isdir(folder_path):
+            raise FileNotFoundError(f"The folder path '{folder_path}' does not exist.")
+        if group_size <= 0 or chunk_size <= 0:
+            raise ValueError("group_size and chunk_size must be positive.")
+        folder_name = os.path.basename(folder_path)
+        extension = file_extension(file_format)
+        storage = get_storage()
+        token_index = audio_token_index(folder_name)
+
+        remote = {
+            blob.name: blob
+            for blob in storage.list_blobs(prefix=f"csv_files/{folder_name}/")
+        }
+
+        def group_path(i):
+            return f"csv_files/{folder_name}/group_{i}{extension}"
+
+        infos = {}  # Group number -> BlobInfo of the group file
+        written = set()  # Group numbers whose file was uploaded
+        unchanged = set()  # Group numbers skipped by sync
+        entries = {}  # Group number -> manifest entry
+        stats = TransferStats()
+
+        def upload_group(i, df):
+            data = serialize_frame(df, file_format)
+            bucket_path = group_path(i)
+            if sync and same_content(content_hashes(data), remote.get(bucket_path)):
+                infos[i] = remote[bucket_path]
+                unchanged.add(i)
+                return
+            if dry_run:
+                written.add(i)
+                return
+            infos[i] = storage.write(
+                bucket_path, data, content_type=content_type(file_format)
+            )
+            written.add(i)
+            stats.add(len(data))
+
+        pending = deque()  # Upload futures, oldest first
+        max_pending = max(1, max_workers) * 2
+
+        def flush(rows):
+            # Upload every group of ``rows``; they must all be complete
+            entries.update(group_entries(rows, {}))
+            for i, df in rows.groupby("group", sort=True):
+                while len(pending) >= max_pending:
+                    pending.popleft().result()
+                pending.append(executor.submit(upload_group, int(i), df))
+
+        splits = {}
+        next_row = 0
+        carry = None  # Rows of the group that is not complete yet
+
+        with tempfile.TemporaryDirectory() as tmp, ThreadPoolExecutor(
+            max_workers=max(1, max_workers)
+        ) as executor:
+            for file_name in ["train.csv", "val.csv"]:
+                split_name = os.path.splitext(file_name)[0]
+                local_path = os.path.join(tmp, f"{split_name}{extension}")
+
+                with FrameWriter(local_path, file_format) as writer:
+                    for chunk in pd.read_csv(
+                        os.path.join(folder_path, file_name), chunksize=chunk_size
+                    ):
+                        chunk = add_edit_columns(chunk, folder_name, token_index)
+                        chunk["group"] = group_ids(
+                            len(chunk), group_size, offset=next_row
+                        )
+                        next_row += len(chunk)
+                        writer.write(chunk)
+
+                        rows = chunk if carry is None else pd.concat([carry, chunk])
+                        last = rows["group"].iloc[-1]
+                        complete = rows["group"].to_numpy() < last
+                        carry = rows[~complete]
+                        if complete.any():
+                            flush(rows[complete])
+
+                splits[split_name] = writer.rows
+                print(f"len {file_name} : {writer.rows}")
+
+                split_path = f"csv_files/{folder_name}/{split_name}{extension}"
+                if sync and same_content(
+                    file_hashes(local_path), remote.get(split_path)
+                ):
+                    stats.skipped += 1
+                elif not dry_run:
+                    storage.write_file(
+                        split_path,
+                        local_path,
+                        content_type=content_type(file_format),
+                        # Lets exports get the split length without downloading the split
+                        metadata={"row_count": str(writer.rows)},
+                        chunk_size=RESUMABLE_CHUNK_SIZE,
+                    )
+                    stats.add(os.path.getsize(local_path))
+
+            if carry is not None and len(carry):
+                flush(carry)
+            while pending:
+                pending.popleft().result()
+
+        print(f"{folder_name} : {len(entries)} groups of up to {group_size} rows")
+        stats.skipped += len(unchanged)
+        if sync:
+            print(
+                f"{folder_name} : CSV sync: {len(written)} groups to upload, "
+                f"{len(unchanged)} unchanged"
+            )
+        if dry_run:
+            return
+        print(f"{folder_name} : {stats.report()}")
 
-            # Define the folder name for Firebase Storage
-            folder_name = f"{parent_folder_name}"
+        for i, entry in entries.items():
+            info = infos.get(int(i))
+            entry["generation"] = info.generation if info else None
+            entry["checksum"] = info.md5_hash if info else None
 
-            # Upload the modified CSV content to Firebase Storage
-            blob = bucket.blob(f"csv_files/{folder_name}/{df_key}")
+        # Edits journaled against a replaced group file no longer apply
+        delete_group_journals(folder_name, written)
 
-            blob.upload_from_string(csv_content_bytes, content_type="text/csv")
+        write_upload_manifest(folder_name, file_format, splits, entries, unchanged)
+
+        # Only once the new files and the manifest are stored
+        delete_other_formats(remote, file_format)
+
+        # The dataset list and its files changed
+        get_catalog().invalidate(folder_name)
 
         print("Upload csv files successfully !")
 
@@ -133,51 +560,261 @@ def upload_csv_files(folder_path, group_size):
         print("An error occurred:", e)
 
 
-def upload_edited_csv_file(csv_content, csv_file_path):
+def merge_csv_files(folder_path, group_size, dry_run=False, max_workers=8):
     """
-    Upload edited CSV content to Firebase Storage.
+    Merge CSV files from a local folder into a dataset already on Firebase Storage.
+
+    Rows are matched with the stored rows by "full_path":
+
+    - groups that were edited (pending journal, changed text, a flag or an edit
+      status set) or marked done are left untouched;
+    - other groups take the current source columns of their matched rows, and are
+      only uploaded if their content actually changed;
+    - rows that are not stored yet are added in new groups of ``group_size`` rows,
+      numbered after the last group, new train rows first.
+
+    Stored rows missing from the source are kept. The train and val files are
+    rebuilt from the groups, and the manifest records which runs of rows, in group
+    order, belong to each split. Datasets that do not exist yet are uploaded with
+    ``upload_csv_files``.
 
     Args:
-        csv_content (str): The edited CSV content as a string.
-        csv_file_path (str): The path of the CSV file on Firebase Storage.
+        folder_path (str): The path of the local folder containing the CSV files.
+        group_size (int): The size of the new groups.
+        dry_run (bool): Only print what would be uploaded.
+        max_workers (int): The number of files read and uploaded concurrently.
 
     Returns:
         None
 
     Raises:
-        ValueError: If the provided CSV content or file path is None or empty.
-        IOError: If there are issues uploading the CSV content to Firebase Storage.
+        FileNotFoundError: If the specified folder path does not exist.
+        ValueError: If group_size is not positive.
+        IOError: If there are issues reading or uploading the files.
     """
     try:
-        bucket_path = f"csv_files/{csv_file_path}"
+        if not os.path.isdir(folder_path):
+            raise FileNotFoundError(f"The folder path '{folder_path}' does not exist.")
+        if group_size <= 0:
+            raise ValueError("group_size must be positive.")
+        folder_name = os.path.basename(folder_path)
+        manifest = get_manifest(folder_name)
+        if not manifest or not manifest.get("groups"):
+            print(f"{folder_name} : no existing dataset, uploading it whole.")
+            return upload_csv_files(
+                folder_path, group_size, dry_run=dry_run, max_workers=max_workers
+            )
+
+        storage = get_storage()
+        file_format = dataset_format(folder_name, manifest)
+        extension = file_extension(file_format)
+        layout = get_split_layout(folder_name)
+
+        def group_path(i):
+            return f"csv_files/{folder_name}/group_{i}{extension}"
+
+        # Source rows, train first, keyed by full_path
+        token_index = audio_token_index(folder_name)
+        source = []
+        for split_name in ["train", "val"]:
+            df = pd.read_csv(os.path.join(folder_path, f"{split_name}.csv"))
+            df = add_edit_columns(df, folder_name, token_index)
+            df["_split"] = split_name
+            source.append(df)
+        source = pd.concat(source, ignore_index=True).drop_duplicates("full_path")
+
+        # Current content of the stored groups, with their journals replayed
+        remote = {
+            blob.name: blob
+            for blob in storage.list_blobs(prefix=f"csv_files/{folder_name}/")
+        }
+        journaled = set()
+        for segment in storage.list_blobs(prefix=f"journal_files/{folder_name}/"):
+            group_num = segment.name.split("/")[2].split("_")[-1]
+            if group_num.isdigit():
+                journaled.add(int(group_num))
+
+        group_nums = sorted(int(i) for i in manifest["groups"])
+
+        def load(group_num):
+            df, _ = read_dataset_file(folder_name, f"group_{group_num}")
+            if df is None:
+                raise IOError(f"group_{group_num} of {folder_name} could not be read.")
+            if group_num in journaled:
+                replay_journal(df, read_journal(folder_name, group_num))
+            return df
+
+        groups = dict(
+            zip(group_nums, ordered_map(load, group_nums, max_workers=max_workers))
+        )
+
+        # Columns that come from the source; text is only taken while unedited
+        source_columns = [
+            column
+            for column in source.columns
+            if column
+            not in EDITABLE_COLUMNS + ["full_path", "raw_text", "group", "_split"]
+        ]
+        source_rows = source.set_index("full_path")
+        uploads = {}  # Bucket path -> content to upload
+        kept, refreshed = [], []
+        stored_paths = set()
+
+        for group_num, df in groups.items():
+            stored_paths.update(df["full_path"])
+            edited = (
+                group_num in journaled
+                or manifest["groups"][str(group_num)].get("edit_status")
+                or df["edit_status"].any()
+                or df[FLAG_COLUMNS].to_numpy().any()
+                or (df["text"].fillna("") != df["raw_text"].fillna("")).any()
+            )
+            if edited:
+                kept.append(group_num)
+                continue
 
-        # Check if the file already exists in Firebase Storage
-        existing_blob = bucket.blob(bucket_path)
+            # Unedited group: take the current source version of its rows
+            matched = df["full_path"].isin(source_rows.index).to_numpy()
+            if matched.any():
+                current = source_rows.loc[df.loc[matched, "full_path"]]
+                for column in source_columns:
+                    if column not in df.columns:
+                        df[column] = None
+                    df.loc[matched, column] = current[column].to_numpy()
+                df.loc[matched, "text"] = current["text"].to_numpy()
+                df.loc[matched, "raw_text"] = current["text"].to_numpy()
+
+            data = serialize_frame(df, file_format)
+            if not same_content(
+                content_hashes(data), remote.get(group_path(group_num))
+            ):
+                uploads[group_path(group_num)] = data
+                refreshed.append(group_num)
+
+        # New rows go to new groups after the last one, new train rows first
+        new_rows = source[~source["full_path"].isin(stored_paths)].copy()
+        start = (max(group_nums) if group_nums else 0) + 1
+        new_rows["group"] = group_ids(len(new_rows), group_size, start=start)
+        for split_name, rows in new_rows.groupby("_split", sort=False):
+            if layout and layout[-1][0] == split_name:
+                layout[-1][1] += len(rows)
+            else:
+                layout.append([split_name, len(rows)])
+        new_rows = new_rows.drop(columns="_split")
+        columns = list(next(iter(groups.values())).columns)
+        new_rows = new_rows.reindex(
+            columns=columns + [c for c in new_rows.columns if c not in columns]
+        )
+        for group_num, df in new_rows.groupby("group", sort=True):
+            groups[int(group_num)] = df
+            uploads[group_path(int(group_num))] = serialize_frame(df, file_format)
+        added = sorted(set(groups) - set(group_nums))
+
+        print(
+            f"{folder_name} : merge: {len(new_rows)} new rows in {len(added)} new groups, "
+            f"{len(refreshed)} groups refreshed, {len(kept)} edited or done groups kept, "
+            f"{len(group_nums) - len(kept) - len(refreshed)} unchanged"
+        )
+        if dry_run:
+            return
 
-        # If the file exists, delete it
-        if existing_blob.exists():
-            existing_blob.delete()
+        # Rebuild the split files from the groups, following the split layout
+        all_rows = pd.concat(
+            [groups[i] for i in sorted(groups)], ignore_index=True, sort=False
+        )
+        split_index = np.repeat(
+            [split_name for split_name, _ in layout], [rows for _, rows in layout]
+        )
+        splits = {}
+        for split_name in ["train", "val"]:
+            split_df = all_rows[split_index[: len(all_rows)] == split_name]
+            splits[split_name] = len(split_df)
+            split_path = f"csv_files/{folder_name}/{split_name}{extension}"
+            data = serialize_frame(split_df, file_format)
+            if not same_content(content_hashes(data), remote.get(split_path)):
+                uploads[split_path] = data
+
+        # Only changed blobs are written; existing groups only if nobody saved meanwhile
+        infos = {}
+
+        def upload(bucket_path):
+            data = uploads[bucket_path]
+            info = remote.get(bucket_path)
+            split_name = os.path.splitext(bucket_path.rsplit("/", 1)[-1])[0]
+            infos[bucket_path] = storage.write(
+                bucket_path,
+                data,
+                content_type=content_type(file_format),
+                metadata=(
+                    {"row_count": str(splits[split_name])}
+                    if split_name in splits
+                    else None
+                ),
+                if_generation_match=(
+                    None
+                    if split_name in splits
+                    else (info.generation if info is not None else 0)
+                ),
+            )
+            return len(data)
 
-        # Convert the CSV content to bytes
-        csv_content_bytes = csv_content.encode()
+        stats = run_bounded(
+            list(uploads), upload, max_workers=max_workers, progress_every=1000
+        )
+        print(f"{folder_name} : {stats.report()}")
+        if stats.failed:
+            raise IOError(
+                f"{len(stats.failed)} files could not be uploaded, manifest not updated."
+            )
+
+        def update(manifest):
+            manifest["splits"] = splits
+            manifest["layout"] = layout
+            for group_num in refreshed + added:
+                manifest["groups"][str(group_num)] = group_entry(
+                    groups[group_num], infos[group_path(group_num)]
+                )
 
-        # Upload the CSV content to Firebase Storage
-        blob = bucket.blob(bucket_path)
+        update_manifest(folder_name, update)
 
-        blob.upload_from_string(csv_content_bytes, content_type="text/csv")
+        # The dataset files changed
+        get_catalog().invalidate(folder_name)
 
-        print("save edited file!")
+        print("Merge csv files successfully !")
 
     except Exception as e:
         print("An error occurred:", e)
 
 
-def upload_audio_files(folder_path):
+def upload_audio_files(
+    folder_path,
+    max_workers=8,
+    chunk_size=RESUMABLE_CHUNK_SIZE,
+    checkpoint_path=None,
+    sync=False,
+    dry_run=False,
+):
     """
     Upload audio files (.wav) from a local folder to Firebase Storage.
 
+    Files are uploaded concurrently on a bounded thread pool. Files larger than
+    ``chunk_size`` are sent as chunked resumable uploads. Every finished file is
+    recorded in a local checkpoint file, so a rerun after a crash skips the files
+    that were already uploaded.
+
+    In sync mode the local MD5/CRC32C hashes are compared with the hashes stored
+    in the bucket, fetched with a single listing, and only new or changed files
+    are uploaded. Changed files keep their download token, so existing audio
+    links stay valid.
+
     Args:
         folder_path (str): The path of the local folder containing the audio files.
+        max_workers (int): The number of concurrent uploads.
+        chunk_size (int): Chunk size in bytes of resumable uploads (a multiple of 256 KiB).
+        checkpoint_path (str): The local checkpoint file. Defaults to
+            ``.upload_checkpoint`` inside ``folder_path``.
+        sync (bool): Only upload files whose content differs from the bucket.
+        dry_run (bool): With ``sync``, only print what would be uploaded.
 
     Returns:
         None
@@ -192,39 +829,108 @@ def upload_audio_files(folder_path):
             raise FileNotFoundError(f"The folder path '{folder_path}' does not exist.")
         # Get the parent folder name
         parent_folder_name = os.path.basename(folder_path)
+        storage = get_storage()
 
-        # Iterate over the files in the folder
-        for file_name in os.listdir(folder_path):
-            if file_name.endswith(".wav"):
-                # Read the CSV file into a DataFrame
-                file_path = os.path.join(folder_path, file_name)
+        checkpoint = UploadCheckpoint(
+            checkpoint_path or os.path.join(folder_path, ".upload_checkpoint")
+        )
 
-                # Upload the modified CSV content to Firebase Storage
-                bucket_path = f"audio_files/{parent_folder_name}/{file_name}"
-                blob = bucket.blob(bucket_path)
+        prefix = f"audio_files/{parent_folder_name}/"
+        remote = {}
 
-                token = uuid4()
+        def upload(file_name):
+            file_path = os.path.join(folder_path, file_name)
+            size = os.path.getsize(file_path)
+            bucket_path = f"{prefix}{file_name}"
 
-                metadata = {"firebaseStorageDownloadTokens": token}
+            # Reuse the token of a replaced file so its links keep working
+            existing = remote.get(bucket_path)
+            token = (existing.metadata if existing else {}).get(
+                "firebaseStorageDownloadTokens"
+            )
+            metadata = {"firebaseStorageDownloadTokens": token or str(uuid4())}
+
+            # Upload with the token as metadata, publicly readable (used for Cloud Storage URL)
+            storage.write_file(
+                bucket_path,
+                file_path,
+                metadata=metadata,
+                public=True,
+                chunk_size=chunk_size if size > chunk_size else None,
+            )
+            # Checkpoint entries are per destination, so other backends re-upload
+            checkpoint.mark_done(f"{storage.cache_id}/{bucket_path}", file_path)
+            return size
+
+        if sync:
+            remote = {blob.name: blob for blob in storage.list_blobs(prefix=prefix)}
+            local_files = {
+                f"{prefix}{entry.name}": entry.path
+                for entry in os.scandir(folder_path)
+                if entry.is_file() and entry.name.endswith(".wav")
+            }
+            plan = SyncPlan(
+                hash_files(local_files, max_workers=max_workers),
+                remote,
+                {name: os.path.getsize(path) for name, path in local_files.items()},
+            )
+            print(f"{parent_folder_name} : Audio sync: {plan.summary()}")
+            if dry_run:
+                return
+
+            stats = run_bounded(
+                (name[len(prefix) :] for name in plan.to_transfer),
+                upload,
+                max_workers=max_workers,
+            )
+            stats.skipped = len(plan.unchanged)
+            print(f"{parent_folder_name} : Audio files synced: {stats.report()}")
+            return
+
+        skipped = 0
+
+        def pending_files():
+            nonlocal skipped
+            # Iterate over the files in the folder
+            for entry in os.scandir(folder_path):
+                if entry.is_file() and entry.name.endswith(".wav"):
+                    bucket_path = f"{storage.cache_id}/{prefix}{entry.name}"
+                    if checkpoint.is_done(bucket_path, entry.path):
+                        skipped += 1
+                        continue
+                    yield entry.name
+
+        stats = run_bounded(pending_files(), upload, max_workers=max_workers)
+        stats.skipped = skipped
+
+        print(f"{parent_folder_name} : Audio files uploaded: {stats.report()}")
+    except Exception as e:
+        print("An error occurred:", e)
 
-                # Assign the token as metadata
-                blob.metadata = metadata
 
-                blob.upload_from_filename(file_path)
+def group_ids(n_rows, group_size, start=1, offset=0):
+    """
+    Compute the group number of each row, for consecutive groups of ``group_size`` rows.
 
-                # Make the file public (OPTIONAL). To be used for Cloud Storage URL.
-                blob.make_public()
+    Args:
+        n_rows (int): The number of rows.
+        group_size (int): The size of each group.
+        start (int): The group number of the first row of the dataset.
+        offset (int): The position of the first row in the dataset, for rows read
+            in chunks.
 
-                print(
-                    f"{parent_folder_name}/{file_name} : Audio file uploaded successfully."
-                )
-    except Exception as e:
-        print("An error occurred:", e)
+    Returns:
+        ndarray: The group number of each row.
+    """
+    return (np.arange(n_rows, dtype=np.int64) + offset) // group_size + start
 
 
 def get_group(files, group):
     """Split files into groups based on group size.
 
+    Train rows are numbered first and val rows continue where train stops, so the
+    last train group can also hold the first val rows.
+
     Args:
         files (dict): A dictionary containing file names as keys and DataFrames as values.
         group (int): The size of each group.
@@ -239,15 +945,10 @@ def get_group(files, group):
     try:
         len_train = len(files["train.csv"])
         len_val = len(files["val.csv"])
-        arr = [0] * (len_train + len_val)
+        arr = group_ids(len_train + len_val, group)
 
-        # Calculate total number of groups and assign group numbers to the array
+        # Calculate total number of groups
         total_group = math.ceil(len(arr) / group)
-        for i in range(total_group):
-            print(f"i : {i}")
-            start_idx = i * group
-            end_idx = min(start_idx + group, len(arr))
-            arr[start_idx:end_idx] = [i + 1] * (end_idx - start_idx)
 
         # Split array into train and val DataFrames
         df_dict = {}
@@ -275,24 +976,11 @@ def name_csv_list(folder_path):
         IOError: If there are issues listing the CSV files.
     """
     try:
-        # List all files in the specified folder
-        blobs = bucket.list_blobs(prefix=f"{folder_path}")
+        # List the first level of sub-folders only, from the cached catalog
+        prefix = f"{folder_path.rstrip('/')}/"
+        _, prefixes = get_catalog().list_dir(prefix)
 
-        folder_names = set()
-
-        for blob in blobs:
-            # Get the path after the prefix
-            relative_path = os.path.relpath(blob.name, folder_path)
-
-            # Extract folder name from the relative path
-            folder_name = os.path.dirname(relative_path)
-
-            folder_names.add(folder_name)
-
-        if "" in folder_names:
-            folder_names.remove("")
-
-        return folder_names
+        return {name[len(prefix) :].rstrip("/") for name in prefixes}
     except Exception as e:
         print("An error occurred:", e)
 
@@ -312,15 +1000,15 @@ def name_csv_group_list(folder_path):
         IOError: If there are issues listing the CSV files.
     """
     try:
-        # List all files in the specified folder
-        blobs = bucket.list_blobs(prefix=f"{folder_path}")
+        # List the files directly in the folder, from the cached catalog
+        prefix = f"{folder_path.rstrip('/')}/"
+        blobs, _ = get_catalog().list_dir(prefix)
         folder_names = set()
 
         for blob in blobs:
             # Get the path after the prefix
-            relative_path = os.path.relpath(blob.name, folder_path)
-            # Extract folder name from the relative path
-            if relative_path not in ["", "train.csv", "val.csv"]:
+            relative_path = blob.name[len(prefix) :]
+            if relative_path.startswith("group_"):
                 folder_names.add(relative_path)
 
         return folder_names
@@ -349,26 +1037,125 @@ def get_csv_file(folder_path, file):
         if folder_path is None:
             return None, "Folder path is None.", None
 
-        blob = bucket.get_blob(f"csv_files/{folder_path}/{file}")
+        # Return the file content as bytes, or None if the file does not exist.
+        # Unchanged files are served from the shared blob cache.
+        return get_blob_cache().get(f"csv_files/{folder_path}/{file}")
+
+    except Exception as e:
+        print("An error occurred:", e)
 
-        if blob is not None:
-            return (
-                blob.download_as_string()
-            )  # Return the file content as bytes and no error message
-        else:
-            return None
+
+def get_csv_file_with_generation(folder_path, file):
+    """
+    Get the content of a CSV file from Firebase Storage along with its generation.
+
+    The generation identifies the version of the file and can be passed to
+    ``write_dataset_file`` to detect concurrent edits.
+
+    Args:
+        folder_path (str): The path of the folder containing the CSV file on Firebase Storage.
+        file (str): The name of the CSV file to retrieve.
+
+    Returns:
+        tuple: The file content as bytes and its generation, or ``(None, None)``
+            if the file does not exist.
+    """
+    try:
+        return get_blob_cache().get_with_generation(f"csv_files/{folder_path}/{file}")
 
     except Exception as e:
         print("An error occurred:", e)
+        return None, None
+
+
+def dataset_format(dataset, manifest=None):
+    """
+    Get the storage format of a dataset on Firebase Storage.
+
+    The format is the one recorded in the dataset manifest. Only datasets ingested
+    before manifests existed are probed for a ``train.parquet`` file.
+
+    Args:
+        dataset (str): The name of the dataset folder.
+        manifest (dict): The dataset manifest, if already read. None reads it.
+
+    Returns:
+        str: "parquet" for Parquet datasets, otherwise "csv" (legacy datasets).
+    """
+    if manifest is None:
+        manifest, _ = read_manifest(dataset)
+    if manifest and manifest.get("format"):
+        return manifest["format"]
 
+    if get_storage().exists(f"csv_files/{dataset}/train.parquet"):
+        return "parquet"
+    return "csv"
 
-def get_audio_link(df, columns, folder_name):
+
+def read_dataset_file(dataset, name, columns=None, file_format=None):
+    """
+    Read a file of a dataset (a group or a split) in the dataset's storage format.
+
+    Args:
+        dataset (str): The name of the dataset folder.
+        name (str): The file name without extension, e.g. "group_1" or "train".
+        columns (list): Only read these columns. None reads all of them.
+        file_format (str): The storage format. Defaults to ``dataset_format``.
+
+    Returns:
+        tuple: The DataFrame and the generation of the file, or ``(None, None)``
+            if the file does not exist.
+    """
+    file_format = file_format or dataset_format(dataset)
+    data, generation = get_csv_file_with_generation(
+        dataset, f"{name}{file_extension(file_format)}"
+    )
+    if data is None:
+        return None, None
+    return deserialize_frame(data, file_format, columns), generation
+
+
+def write_dataset_file(dataset, name, df, if_generation_match=None, file_format=None):
+    """
+    Write a file of a dataset (a group or a split) in the dataset's storage format.
+
+    Args:
+        dataset (str): The name of the dataset folder.
+        name (str): The file name without extension, e.g. "group_1" or "train".
+        df (DataFrame): The file content.
+        if_generation_match (int): Only write if the stored file has this generation.
+        file_format (str): The storage format. Defaults to ``dataset_format``.
+
+    Raises:
+        ConflictError: If the file was changed since ``if_generation_match``.
+
+    Returns:
+        BlobInfo: The metadata of the written file.
+    """
+    file_format = file_format or dataset_format(dataset)
+    bucket_path = f"csv_files/{dataset}/{name}{file_extension(file_format)}"
+    data = serialize_frame(df, file_format)
+
+    info = get_storage().write(
+        bucket_path,
+        data,
+        content_type=content_type(file_format),
+        if_generation_match=if_generation_match,
+    )
+    get_blob_cache().put(bucket_path, data, info.generation)
+    return info
+
+
+def get_audio_link(df, columns, folder_name, bulk=False, token_index=None):
     """Get download links for audio files stored in a cloud bucket.
 
     Args:
         df (DataFrame): DataFrame containing audio file information.
         columns (str or list of str): Name(s) of the column(s) containing the audio file paths.
         folder_name (str): Name of the folder where audio files are stored in the bucket.
+        bulk (bool): Resolve every link from a single listing of the audio folder
+            (see ``get_audio_links_bulk``) instead of fetching each blob's metadata.
+        token_index (dict): With ``bulk``, a prebuilt index from ``audio_token_index``.
 
     Raises:
         KeyError: If the specified column(s) do not exist in the DataFrame.
@@ -378,6 +1165,18 @@ def get_audio_link(df, columns, folder_name):
         list: A list containing download links for each audio file.
     """
     try:
+        if bulk:
+            audio_link, missing = get_audio_links_bulk(
+                df, columns, folder_name, token_index
+            )
+            if missing:
+                print(
+                    f"{len(missing)} audio files not found in audio_files/{folder_name}/, "
+                    f"e.g. {missing[:5]}"
+                )
+            return audio_link
+
+        storage = get_storage()
         audio_link = []
         for index, row in df.iterrows():
 
@@ -385,26 +1184,19 @@ def get_audio_link(df, columns, folder_name):
 
             bucket_path = f"audio_files/{folder_name}/{audio_path}"
 
-            # Get a blob reference to the audio file
-            blob = bucket.get_blob(bucket_path)
+            # Fetches object metadata
+            blob = storage.stat(bucket_path)
 
             # Check if the blob exists
-            if not blob.exists():
+            if blob is None:
                 print(f"{bucket_path} : not found")
                 audio_link.append(None)
                 continue
 
-            # Fetches object metadata
-            metadata = blob.metadata
-
             # Firebase Access Token
-            token = metadata["firebaseStorageDownloadTokens"]
+            token = blob.metadata["firebaseStorageDownloadTokens"]
 
-            firebase_storageURL = "https://firebasestorage.googleapis.com/v0/b/{}/o/{}?alt=media&token={}".format(
-                storageBucket,
-                bucket_path.replace("/", "%2F").replace(" ", "%20"),
-                token,
-            )
+            firebase_storageURL = storage.download_url(bucket_path, token)
 
             audio_link.append(firebase_storageURL)
 
@@ -416,6 +1208,65 @@ def get_audio_link(df, columns, folder_name):
         print("An error occurred:", e)
 
 
+def audio_token_index(folder_name):
+    """
+    Map the audio files of a folder to their download token, with a single listing.
+
+    Args:
+        folder_name (str): Name of the folder where audio files are stored in the bucket.
+
+    Returns:
+        dict: Audio file name -> Firebase download token.
+    """
+    prefix = f"audio_files/{folder_name}/"
+
+    # One listing call, metadata included
+    return {
+        blob.name[len(prefix) :]: blob.metadata.get("firebaseStorageDownloadTokens")
+        for blob in get_storage().list_blobs(prefix=prefix)
+    }
+
+
+def get_audio_links_bulk(df, column, folder_name, token_index=None):
+    """Get download links for audio files using a single listing of the audio folder.
+
+    The folder ``audio_files/<folder_name>/`` is listed once with its metadata to build
+    a file name -> download token index, and every link is built with vectorized string
+    operations over ``column``.
+
+    Args:
+        df (DataFrame): DataFrame containing audio file information.
+        column (str): Name of the column containing the audio file paths.
+        folder_name (str): Name of the folder where audio files are stored in the bucket.
+        token_index (dict): A prebuilt index from ``audio_token_index``, reused when
+            links are built chunk by chunk. None lists the folder.
+
+    Raises:
+        KeyError: If the specified column does not exist in the DataFrame.
+
+    Returns:
+        tuple: A list containing the download link of each row (None when the audio file
+            is missing), and a list of the bucket paths that were not found.
+    """
+    storage = get_storage()
+    prefix = f"audio_files/{folder_name}/"
+    if token_index is None:
+        token_index = audio_token_index(folder_name)
+
+    names = df[column].astype(str).str.rsplit("/", n=1).str[-1]
+    bucket_paths = prefix + names
+    tokens = names.map(token_index)
+    found = tokens.notna()
+
+    audio_link = np.full(len(df), None, dtype=object)
+    if found.any():
+        audio_link[found.to_numpy()] = storage.download_urls(
+            bucket_paths[found], tokens[found]
+        ).to_numpy()
+
+    return audio_link.tolist(), bucket_paths[~found].tolist()
+
+
 def download_csv_file(remote_file_path, local_destination_folder):
     """
     Download a CSV file from Firebase Storage to the specified local folder.
@@ -433,10 +1284,8 @@ def download_csv_file(remote_file_path, local_destination_folder):
         None
     """
     try:
-        # Download the CSV file from Firebase Storage
-        blob = bucket.blob(
-            f"csv_files/{remote_file_path}"  # Path to the CSV file in Firebase Storage
-        )
+        # Path to the CSV file in Firebase Storage
+        bucket_path = f"csv_files/{remote_file_path}"
 
         # Split the remote_file_path to get the file name
         file_name = ("_").join(remote_file_path.split("/"))
@@ -445,24 +1294,82 @@ def download_csv_file(remote_file_path, local_destination_folder):
         local_file_path = f"{local_destination_folder}/{file_name}"
 
         # Download the file to the correct local directory
-        blob.download_to_filename(local_file_path)
+        get_storage().download_to_filename(bucket_path, local_file_path)
 
         print("CSV file downloaded successfully.")
     except Exception as e:
         print("An error occurred:", e)
 
 
-def concat_csv_files_for_downloading(remote_file_path, local_destination_folder):
+def get_split_lengths(dataset):
+    """
+    Get the number of rows of the train and val splits of a dataset without downloading them.
+
+    The lengths come from the dataset manifest, or from the ``row_count`` metadata of
+    the split files. Only legacy datasets without either fall back to reading the files.
+
+    Parameters:
+        dataset (str): The name of the dataset folder on Firebase Storage.
+
+    Returns:
+        tuple: The number of train rows and val rows (0 when a split is not found).
+    """
+    manifest = get_manifest(dataset) or {}
+    splits = manifest.get("splits") or {}
+    if "train" in splits and "val" in splits:
+        return int(splits["train"]), int(splits["val"])
+
+    storage = get_storage()
+    extension = file_extension(dataset_format(dataset, manifest))
+    lengths = []
+    for split_name in ["train", "val"]:
+        info = storage.stat(f"csv_files/{dataset}/{split_name}{extension}")
+        if info is None:
+            lengths.append(0)
+        elif "row_count" in info.metadata:
+            lengths.append(int(info.metadata["row_count"]))
+        else:
+            df, _ = read_dataset_file(dataset, split_name, columns=["group"])
+            lengths.append(len(df))
+    return tuple(lengths)
+
+
+def get_split_layout(dataset):
+    """
+    Get which rows of a dataset, taken in group order, belong to each split.
+
+    Datasets ingested in one go hold all train rows and then all val rows. Merged
+    datasets record further runs of rows in their manifest.
+
+    Parameters:
+        dataset (str): The name of the dataset folder on Firebase Storage.
+
+    Returns:
+        list: ``[split name, number of rows]`` runs, in group order.
+    """
+    manifest = get_manifest(dataset) or {}
+    if manifest.get("layout"):
+        return [list(run) for run in manifest["layout"]]
+    len_train, len_val = get_split_lengths(dataset)
+    return [["train", len_train], ["val", len_val]]
+
+
+def concat_csv_files_for_downloading(
+    remote_file_path, local_destination_folder, max_workers=8
+):
     """
     Concatenate CSV files from Firebase Storage and save them to the specified local folder.
 
-    This function downloads all CSV files from a specified folder in Firebase Storage,
-    concatenates them, sorts by the "group" column, and then splits the concatenated DataFrame
-    into train and validation sets based on their respective lengths.
+    This function downloads the group files of a dataset (with their pending edits)
+    concurrently, takes them in group order and streams their rows into the train and
+    validation files, split based on the lengths recorded in the dataset metadata.
+    Only a bounded number of groups is held in memory, so datasets larger than the
+    available memory can be exported.
 
     Parameters:
         remote_file_path (str): The path of the folder containing CSV files on Firebase Storage.
         local_destination_folder (str): The local folder where the concatenated CSV files will be saved.
+        max_workers (int): The number of group files downloaded concurrently.
 
     Raises:
         ValueError: If the remote file path or local destination folder is invalid.
@@ -472,54 +1379,64 @@ def concat_csv_files_for_downloading(remote_file_path, local_destination_folder)
     Returns:
         None
     """
-
-    # Initialize an empty list to store DataFrame objects
-    dfs = []
-    len_train = 0
-    len_val = 0
-    cnt_row = 0
-    # Iterate through each blob in the specified folder
-    blobs = bucket.list_blobs(prefix=f"csv_files/{remote_file_path}")
-
-    for blob in blobs:
-        # Check if the blob is a CSV file
-        if blob.name.endswith(".csv"):
-            # Download the CSV file contents
-            blob_content = blob.download_as_string()
-
-            # Convert the CSV file contents to a DataFrame
-            df = pd.read_csv(StringIO(blob_content.decode()))
-            if blob.name.split("/")[-1] == "train.csv":
-                len_train = len(df)
-                print(len_train)
-
-            elif blob.name.split("/")[-1] == "val.csv":
-                len_val = len(df)
-                print(len_val)
-            else:
-                # Append the DataFrame to the list
-                dfs.append(df)
-                cnt_row += len(df)
-                print(f"{blob.name}, {len(df)}")
-
-    # Concatenate all DataFrames in the list
-    concatenated_df = pd.concat(dfs, ignore_index=True)
-    # Sort the DataFrame by the "group" column
-    concatenated_df_sorted = concatenated_df.sort_values(by="group")
+    len_train, len_val = get_split_lengths(remote_file_path)
 
     # Check if train.csv and val.csv lengths are found
     if len_train == 0 or len_val == 0:
         print("Failed to find lengths of train.csv or val.csv.")
         return
-    print(len(concatenated_df_sorted))
-    # Split concatenated DataFrame into train.csv and val.csv based on lengths
-    train_df = concatenated_df_sorted[:len_train]
-    val_df = concatenated_df_sorted[len_train:]
-    # Save the concatenated DataFrame to a CSV file
-    train_df.to_csv(
-        f"{local_destination_folder}/{remote_file_path}_train.csv", index=False
+
+    group_nums = sorted(
+        int(os.path.splitext(file)[0].split("_")[-1])
+        for file in name_csv_group_list(f"csv_files/{remote_file_path}")
     )
-    val_df.to_csv(f"{local_destination_folder}/{remote_file_path}_val.csv", index=False)
+
+    file_format = dataset_format(remote_file_path)
+
+    def download(group_num):
+        df, _ = load_group(remote_file_path, group_num, file_format)
+        if df is None:
+            raise IOError(f"group_{group_num} of {remote_file_path} could not be read.")
+        return df
+
+    train_path = f"{local_destination_folder}/{remote_file_path}_train.csv"
+    val_path = f"{local_destination_folder}/{remote_file_path}_val.csv"
+    # Runs of rows, in group order, and the split they belong to
+    layout = deque(get_split_layout(remote_file_path))
+    cnt_row = 0
+    header = True
+
+    with open(train_path, "w", newline="", encoding="utf-8") as train_file, open(
+        val_path, "w", newline="", encoding="utf-8"
+    ) as val_file:
+        outputs = {"train": train_file, "val": val_file}
+        # Groups arrive in order; rows go to the split of the run they fall in
+        for df in ordered_map(download, group_nums, max_workers=max_workers):
+            if header:
+                df.iloc[:0].to_csv(train_file, index=False)
+                df.iloc[:0].to_csv(val_file, index=False)
+                header = False
+            position = 0
+            while position < len(df):
+                if not layout:
+                    # Rows beyond the recorded lengths are exported as val
+                    layout.append(["val", len(df) - position])
+                split_name, rows = layout[0]
+                part = df.iloc[position : position + rows]
+                part.to_csv(outputs[split_name], index=False, header=False)
+                position += len(part)
+                if len(part) == rows:
+                    layout.popleft()
+                else:
+                    layout[0] = [split_name, rows - len(part)]
+            cnt_row += len(df)
+
+    print(cnt_row)
+    if cnt_row != len_train + len_val:
+        print(
+            f"Warning: exported {cnt_row} rows, expected {len_train + len_val} "
+            f"({len_train} train, {len_val} val)."
+        )
 
     print(f"Concatenated CSV file saved to: {local_destination_folder}")
 
@@ -544,10 +1461,218 @@ def editing_done(remote_file_path, group_num):
         None
     """
 
-    csv_file = get_csv_file(remote_file_path, f"group_{group_num}.csv")
-    df = pd.read_csv(BytesIO(csv_file))
+    df, generation = read_dataset_file(remote_file_path, f"group_{group_num}")
 
     df["edit_status"] = [True] * len(df)
-    csv = df.to_csv(index=False)
 
-    upload_edited_csv_file(csv, f"{remote_file_path}/group_{group_num}.csv")
+    info = write_dataset_file(
+        remote_file_path,
+        f"group_{group_num}",
+        df,
+        if_generation_match=generation,
+    )
+    update_group(remote_file_path, group_num, df, info)
+
+
+def prefetch_group_audio(dataset, group_num, rows):
+    """
+    Warm the audio cache with the first rows of a group, in the background.
+
+    The group file is read on the prefetch threads (through the blob cache), so the
+    caller does not wait for it. Rows never move within a group, so the journal is
+    not needed to find the audio files.
+
+    Parameters:
+        dataset (str): The name of the dataset folder on Firebase Storage.
+        group_num (int): The group number.
+        rows (int): The number of rows to prefetch, e.g. one page.
+
+    Returns:
+        Future: The background task.
+    """
+
+    def prefetch():
+        try:
+            df, _ = read_dataset_file(
+                dataset, f"group_{group_num}", columns=["full_path"]
+            )
+            if df is None:
+                return
+            get_audio_cache().prefetch(
+                [
+                    audio_bucket_path(dataset, path)
+                    for path in df["full_path"].iloc[:rows]
+                ]
+            )
+
+        except Exception as e:
+            print("An error occurred:", e)
+
+    return get_audio_cache().submit(prefetch)
+
+
+def load_group(dataset, group_num, file_format=None, columns=None):
+    """
+    Load the current version of a group: its base file with the edit journal replayed.
+
+    Parameters:
+        dataset (str): The name of the dataset folder on Firebase Storage.
+        group_num (int): The group number.
+        file_format (str): The storage format of the dataset, if already known.
+            Defaults to ``dataset_format``.
+        columns (list): Only read these columns; with Parquet the other columns
+            are not decoded. Journal edits of other columns are skipped. None
+            reads all of them.
+
+    Returns:
+        tuple: The group DataFrame and the generation of its base file, or
+            ``(None, None)`` if the group does not exist.
+    """
+    try:
+        df, generation = read_dataset_file(
+            dataset, f"group_{group_num}", columns=columns, file_format=file_format
+        )
+        if df is None:
+            return None, None
+        replay_journal(df, read_journal(dataset, group_num))
+        return df, generation
+
+    except Exception as e:
+        print("An error occurred:", e)
+        return None, None
+
+
+def save_group_edits(dataset, group_num, base_df, edited_df):
+    """
+    Save the edits of a group as a delta in its journal.
+
+    Only the cells that differ between ``base_df`` and ``edited_df`` are written, so
+    the bytes sent are proportional to the edits, not to the group size. The journal
+    is compacted into the group file once it grows large.
+
+    Parameters:
+        dataset (str): The name of the dataset folder on Firebase Storage.
+        group_num (int): The group number.
+        base_df (DataFrame): The group as last saved (or loaded).
+        edited_df (DataFrame): The edited group, with rows in the same order.
+
+    Raises:
+        ConflictError: If the group file was compacted concurrently.
+
+    Returns:
+        int: The number of changed cells written.
+    """
+    entries = diff_group(base_df, edited_df)
+    append_journal(dataset, group_num, entries)
+    if entries:
+        update_group(dataset, group_num, edited_df)
+
+    if entries and journal_needs_compaction(list_journal(dataset, group_num)):
+        compact_group(dataset, group_num)
+
+    return len(entries)
+
+
+def compact_group(dataset, group_num):
+    """
+    Fold the edit journal of a group into its ``group_N`` file.
+
+    The group file is replaced conditionally on the generation it was read at, and
+    only the journal segments that were folded in are deleted afterwards.
+
+    Parameters:
+        dataset (str): The name of the dataset folder on Firebase Storage.
+        group_num (int): The group number.
+
+    Raises:
+        ConflictError: If the group file changed while compacting.
+
+    Returns:
+        int: The generation of the compacted group file, or None if nothing was compacted.
+    """
+    segments = list_journal(dataset, group_num)
+    if not segments:
+        return None
+
+    df, generation = read_dataset_file(dataset, f"group_{group_num}")
+    replay_journal(df, read_journal(dataset, group_num, segments))
+
+    info = write_dataset_file(
+        dataset, f"group_{group_num}", df, if_generation_match=generation
+    )
+    update_group(dataset, group_num, df, info)
+
+    storage = get_storage()
+    for segment in segments:
+        storage.delete(segment.name)
+
+    print(f"{dataset}/group_{group_num} : compacted {len(segments)} journal segments")
+    return info.generation
+
+
+def save_group(dataset, group_num, base_df, edited_df, done=False):
+    """
+    Save the edits of a group.
+
+    This is the save run by the background ``SaveQueue`` of the editor. Marking a
+    group done only sends its ``edit_status`` cells (with any other pending edit) as
+    a journal entry; the group file is not rewritten, the journal being folded in
+    once it exceeds the compaction limits like for any other save.
+
+    Parameters:
+        dataset (str): The name of the dataset folder on Firebase Storage.
+        group_num (int): The group number.
+        base_df (DataFrame): The group as last saved (or loaded).
+        edited_df (DataFrame): The edited group, with rows in the same order.
+        done (bool): The group was marked done.
+
+    Raises:
+        ConflictError: If the group file was compacted concurrently while saving.
+
+    Returns:
+        int: The number of changed cells written.
+    """
+    changed = save_group_edits(dataset, group_num, base_df, edited_df)
+    status = " (done)" if done else ""
+    print(f"group_{group_num} : {changed} edited cells saved{status}")
+    return changed
+
+
+def get_manifest(dataset):
+    """
+    Get the manifest of a dataset: per group row count, edit status, file
+    generation, checksum and flag counts, from a single small read.
+
+    Datasets ingested before manifests existed get one built from their group
+    files on first use.
+
+    Parameters:
+        dataset (str): The name of the dataset folder on Firebase Storage.
+
+    Returns:
+        dict: The manifest, or None if it could not be read or built.
+    """
+    try:
+        manifest, _ = read_manifest(dataset)
+        if manifest is not None:
+            return manifest
+
+        storage = get_storage()
+        manifest = empty_manifest()
+        manifest["format"] = dataset_format(dataset, manifest)
+        for file in name_csv_group_list(f"csv_files/{dataset}"):
+            name = os.path.splitext(file)[0]
+            group_num = int(name.split("_")[-1])
+            df, _ = load_group(dataset, group_num, manifest["format"])
+            info = storage.stat(f"csv_files/{dataset}/{file}")
+            manifest["groups"][str(group_num)] = group_entry(df, info)
+
+        try:
+            write_manifest(dataset, manifest, if_generation_match=0)
+        except ConflictError:
+            # Built concurrently by another session
+            manifest, _ = read_manifest(dataset)
+        return manifest
+
+    except Exception as e:
+        print("An error occurred:", e)
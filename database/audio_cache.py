@@ -0,0 +1,111 @@
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from database.storage import get_config, get_storage
+
+
+def audio_bucket_path(folder_name, file_path):
+    """Return the bucket path of an audio file, as uploaded by ``upload_audio_files``."""
+    return f"audio_files/{folder_name}/{str(file_path).rsplit('/', 1)[-1]}"
+
+
+class AudioCache:
+    """
+    Warm cache of audio files, read ahead of playback.
+
+    The editor prefetches the audio of the pages the annotator is likely to open
+    next on background threads, so they play from memory instead of starting a cold
+    fetch when the page renders. The cache is shared by every session and bounded
+    in bytes, least recently used files evicted first.
+    """
+
+    def __init__(self, max_bytes=None, max_workers=4):
+        """
+        Args:
+            max_bytes (int): The most bytes kept. Defaults to the ``audio_cache_mb``
+                configuration value (in MB), or 256 MB.
+            max_workers (int): The number of concurrent reads.
+        """
+        if max_bytes is None:
+            max_bytes = int(float(get_config("audio_cache_mb", 256)) * 1024 * 1024)
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # (storage cache id, path) -> bytes
+        self._size = 0
+        self._inflight = {}  # (storage cache id, path) -> Future
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="audio-prefetch"
+        )
+
+    def get(self, path):
+        """
+        Get an audio file if it is cached. Never waits for a read.
+
+        Args:
+            path (str): The bucket path of the audio file.
+
+        Returns:
+            bytes: The audio file, or None if it is not cached (yet).
+        """
+        key = (get_storage().cache_id, path)
+        with self._lock:
+            data = self._entries.get(key)
+            if data is not None:
+                self._entries.move_to_end(key)
+            return data
+
+    def prefetch(self, paths):
+        """
+        Read audio files into the cache in the background.
+
+        Files already cached or being read are skipped.
+
+        Args:
+            paths (list): The bucket paths of the audio files.
+
+        Returns:
+            None
+        """
+        storage = get_storage()
+        with self._lock:
+            for path in paths:
+                key = (storage.cache_id, path)
+                if key in self._entries or key in self._inflight:
+                    continue
+                self._inflight[key] = self._executor.submit(self._read, storage, key)
+
+    def submit(self, fn, *args):
+        """Run ``fn(*args)`` on the prefetch threads, e.g. to find what to prefetch."""
+        return self._executor.submit(fn, *args)
+
+    def _read(self, storage, key):
+        try:
+            data = storage.read(key[1])
+        except Exception as e:
+            data = None
+            print(f"{key[1]} : prefetch failed: {e}")
+
+        with self._lock:
+            del self._inflight[key]
+            if data is None or len(data) > self.max_bytes:
+                return
+            self._entries[key] = data
+            self._size += len(data)
+            while self._size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= len(evicted)
+
+
+_audio_cache = None
+_audio_cache_lock = threading.Lock()
+
+
+def get_audio_cache():
+    """Return the audio cache of this server, shared by every Streamlit session."""
+    global _audio_cache
+    if _audio_cache is None:
+        with _audio_cache_lock:
+            if _audio_cache is None:
+                _audio_cache = AudioCache()
+    return _audio_cache
@@ -0,0 +1,130 @@
+import os
+import json
+import time
+import sqlite3
+import tempfile
+import threading
+
+from database.storage import get_config
+from database.journal import plain_value
+
+
+class AutosaveLog:
+    """
+    Local write-ahead log of the edits that are not saved to storage yet.
+
+    Every edit is written to a SQLite database in WAL mode, keyed by dataset,
+    group, row and column, so an edit survives a browser refresh, a dropped
+    websocket or a server restart without a network round trip. Commits are
+    appended to the WAL file and fsynced at checkpoints. Entries are removed
+    once the edits they hold have been saved to storage.
+    """
+
+    def __init__(self, path=None):
+        """
+        Args:
+            path (str): The SQLite database file. Defaults to the ``autosave_path``
+                configuration value, or ``asr-autosave.sqlite3`` in the temp folder.
+        """
+        self.path = path or get_config(
+            "autosave_path", os.path.join(tempfile.gettempdir(), "asr-autosave.sqlite3")
+        )
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(self.path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        # Durable across process crashes; fsync is batched at WAL checkpoints
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS edits (
+                dataset TEXT NOT NULL,
+                group_num INTEGER NOT NULL,
+                row INTEGER NOT NULL,
+                column_name TEXT NOT NULL,
+                value TEXT,
+                ts REAL NOT NULL,
+                PRIMARY KEY (dataset, group_num, row, column_name)
+            )
+            """)
+        self._db.commit()
+
+    def record(self, dataset, group_num, entries):
+        """
+        Log edits of a group; a later edit of the same cell replaces the earlier one.
+
+        Args:
+            dataset (str): The dataset name.
+            group_num (int): The group number.
+            entries (list): ``{"row", "column", "value"}`` dicts, rows being
+                positions in the group.
+        """
+        if not entries:
+            return
+        ts = time.time()
+        rows = [
+            (
+                dataset,
+                int(group_num),
+                int(entry["row"]),
+                entry["column"],
+                json.dumps(plain_value(entry["value"]), ensure_ascii=False),
+                ts,
+            )
+            for entry in entries
+        ]
+        with self._lock:
+            self._db.executemany(
+                "INSERT OR REPLACE INTO edits VALUES (?, ?, ?, ?, ?, ?)", rows
+            )
+            self._db.commit()
+
+    def pending(self, dataset, group_num):
+        """
+        Get the logged edits of a group, oldest first.
+
+        Returns:
+            list: Journal entries ``{"row", "column", "value", "ts"}``, ready for
+                ``replay_journal``.
+        """
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT row, column_name, value, ts FROM edits "
+                "WHERE dataset = ? AND group_num = ? ORDER BY ts",
+                (dataset, int(group_num)),
+            ).fetchall()
+        return [
+            {"row": row, "column": column, "value": json.loads(value), "ts": ts}
+            for row, column, value, ts in rows
+        ]
+
+    def clear(self, dataset, group_num, up_to=None):
+        """
+        Remove the logged edits of a group once they are saved to storage.
+
+        Args:
+            dataset (str): The dataset name.
+            group_num (int): The group number.
+            up_to (float): Only remove the edits logged at or before this time, so
+                edits made while the save was running are kept. None removes all.
+        """
+        query = "DELETE FROM edits WHERE dataset = ? AND group_num = ?"
+        params = (dataset, int(group_num))
+        if up_to is not None:
+            query += " AND ts <= ?"
+            params += (up_to,)
+        with self._lock:
+            self._db.execute(query, params)
+            self._db.commit()
+
+
+_autosave_log = None
+_autosave_lock = threading.Lock()
+
+
+def get_autosave_log():
+    """Return the autosave log of this server, shared by every Streamlit session."""
+    global _autosave_log
+    if _autosave_log is None:
+        with _autosave_lock:
+            if _autosave_log is None:
+                _autosave_log = AutosaveLog()
+    return _autosave_log
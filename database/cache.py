@@ -0,0 +1,244 @@
+import os
+import glob
+import hashlib
+import tempfile
+import threading
+from collections import OrderedDict
+
+from database.storage import get_config, get_storage
+
+
+class BlobCache:
+    """
+    Read-through cache of blob contents, validated against the blob generation.
+
+    Every lookup first fetches the blob metadata (no content) and only serves
+    a cached copy whose generation matches the stored one, so an unchanged
+    blob is downloaded at most once per server. Entries are kept in a
+    process-wide in-memory LRU and in an on-disk LRU shared between
+    processes, both bounded by a byte budget.
+    """
+
+    def __init__(self, max_bytes=None, cache_dir=None, disk_max_bytes=None):
+        """
+        Args:
+            max_bytes (int): Byte budget of the in-memory LRU.
+            cache_dir (str): Directory of the on-disk cache. None or "" disables it.
+            disk_max_bytes (int): Byte budget of the on-disk cache.
+        """
+        self.max_bytes = int(
+            max_bytes or get_config("blob_cache_bytes", 256 * 1024 * 1024)
+        )
+        self.disk_max_bytes = int(
+            disk_max_bytes or get_config("blob_cache_disk_bytes", 1024 * 1024 * 1024)
+        )
+        if cache_dir is None:
+            cache_dir = get_config(
+                "blob_cache_dir", os.path.join(tempfile.gettempdir(), "asr-blob-cache")
+            )
+        self.cache_dir = cache_dir or None
+        if self.cache_dir:
+            os.makedirs(self.cache_dir, exist_ok=True)
+
+        self._entries = OrderedDict()  # key -> (generation, bytes)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.counters = {
+            "hits": 0,
+            "disk_hits": 0,
+            "misses": 0,
+            "not_found": 0,
+            "evictions": 0,
+        }
+
+    @staticmethod
+    def _key(storage, path):
+        return hashlib.sha1(f"{storage.cache_id}:{path}".encode()).hexdigest()
+
+    def _count(self, name):
+        with self._lock:
+            self.counters[name] += 1
+
+    def _memory_get(self, key, generation):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] != generation:
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def _memory_put(self, key, generation, data):
+        if len(data) > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= len(old[1])
+            self._entries[key] = (generation, data)
+            self._bytes += len(data)
+            while self._bytes > self.max_bytes:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self._bytes -= len(evicted)
+                self.counters["evictions"] += 1
+
+    def _disk_path(self, key, generation):
+        return os.path.join(self.cache_dir, f"{key}-{generation}")
+
+    def _disk_get(self, key, generation):
+        if not self.cache_dir:
+            return None
+        file_path = self._disk_path(key, generation)
+        try:
+            with open(file_path, "rb") as f:
+                data = f.read()
+            # Refresh the modification time, used as the LRU clock on disk
+            os.utime(file_path)
+            return data
+        except OSError:
+            return None
+
+    def _disk_put(self, key, generation, data):
+        if not self.cache_dir or len(data) > self.disk_max_bytes:
+            return
+        try:
+            # Older generations of the same blob are never served again
+            for stale in glob.glob(os.path.join(self.cache_dir, f"{key}-*")):
+                os.remove(stale)
+            tmp_path = os.path.join(
+                self.cache_dir, f".tmp-{os.getpid()}-{threading.get_ident()}"
+            )
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, self._disk_path(key, generation))
+            self._disk_evict()
+        except OSError as e:
+            print("An error occurred:", e)
+
+    def _disk_evict(self):
+        files = []
+        total = 0
+        with os.scandir(self.cache_dir) as it:
+            for entry in it:
+                if entry.is_file() and not entry.name.startswith(".tmp-"):
+                    stat = entry.stat()
+                    files.append((stat.st_mtime, stat.st_size, entry.path))
+                    total += stat.st_size
+        for _, size, file_path in sorted(files):
+            if total <= self.disk_max_bytes:
+                break
+            try:
+                os.remove(file_path)
+                total -= size
+                self._count("evictions")
+            except OSError:
+                pass
+
+    def get(self, path, storage=None):
+        """
+        Get the content of a blob, downloading it only if the cached copy is stale.
+
+        Args:
+            path (str): The path of the blob.
+            storage (StorageBackend): The backend to read from. Defaults to the app backend.
+
+        Returns:
+            bytes or None: The blob content, or None if the blob does not exist.
+        """
+        return self.get_with_generation(path, storage)[0]
+
+    def get_with_generation(self, path, storage=None):
+        """
+        Like ``get``, also returning the generation of the returned content.
+
+        Args:
+            path (str): The path of the blob.
+            storage (StorageBackend): The backend to read from. Defaults to the app backend.
+
+        Returns:
+            tuple: The blob content and its generation, or ``(None, None)`` if the
+                blob does not exist.
+        """
+        storage = storage or get_storage()
+        key = self._key(storage, path)
+
+        # Metadata-only revalidation
+        info = storage.stat(path)
+        if info is None:
+            self._count("not_found")
+            self.invalidate(path, storage)
+            return None, None
+
+        data = self._memory_get(key, info.generation)
+        if data is not None:
+            self._count("hits")
+            return data, info.generation
+
+        data = self._disk_get(key, info.generation)
+        if data is not None:
+            self._count("disk_hits")
+            self._memory_put(key, info.generation, data)
+            return data, info.generation
+
+        self._count("misses")
+        data = storage.read(path)
+        if data is None:
+            return None, None
+        self.put(path, data, info.generation, storage)
+        return data, info.generation
+
+    def put(self, path, data, generation, storage=None):
+        """
+        Store the content of a blob, e.g. right after the app uploaded it.
+
+        Args:
+            path (str): The path of the blob.
+            data (bytes): The blob content.
+            generation (int): The generation of the blob holding ``data``.
+            storage (StorageBackend): The backend the blob belongs to.
+        """
+        storage = storage or get_storage()
+        key = self._key(storage, path)
+        self._memory_put(key, generation, data)
+        self._disk_put(key, generation, data)
+
+    def invalidate(self, path, storage=None):
+        """Drop every cached copy of a blob."""
+        storage = storage or get_storage()
+        key = self._key(storage, path)
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= len(old[1])
+        if self.cache_dir:
+            for stale in glob.glob(os.path.join(self.cache_dir, f"{key}-*")):
+                try:
+                    os.remove(stale)
+                except OSError:
+                    pass
+
+    def stats(self):
+        """
+        Return the hit/miss counters of the cache.
+
+        Returns:
+            dict: The counters, plus the number and size of in-memory entries.
+        """
+        with self._lock:
+            stats = dict(self.counters)
+            stats["entries"] = len(self._entries)
+            stats["bytes"] = self._bytes
+        return stats
+
+
+_blob_cache = None
+_blob_cache_lock = threading.Lock()
+
+
+def get_blob_cache():
+    """Return the process-wide blob cache shared by every Streamlit session."""
+    global _blob_cache
+    if _blob_cache is None:
+        with _blob_cache_lock:
+            if _blob_cache is None:
+                _blob_cache = BlobCache()
+    return _blob_cache
@@ -0,0 +1,80 @@
+import time
+import threading
+
+from database.storage import get_config, get_storage
+
+
+class DatasetCatalog:
+    """
+    Cached listings of the datasets and their group files.
+
+    Listings use prefix/delimiter queries, so only one level of the bucket is
+    listed, and results are kept for ``ttl`` seconds. Uploads invalidate the
+    affected entries explicitly.
+    """
+
+    def __init__(self, ttl=None, root="csv_files"):
+        """
+        Args:
+            ttl (float): Seconds a listing stays valid. Defaults to the
+                ``catalog_ttl`` configuration value, or 60.
+            root (str): The folder holding one sub-folder per dataset.
+        """
+        self.ttl = float(ttl if ttl is not None else get_config("catalog_ttl", 60))
+        self.root = root
+        self._entries = {}  # (storage cache id, prefix) -> (expires, blobs, prefixes)
+        self._lock = threading.Lock()
+
+    def list_dir(self, prefix):
+        """
+        List one level under ``prefix``, served from the cache while it is fresh.
+
+        Args:
+            prefix (str): The prefix to list, ending with "/".
+
+        Returns:
+            tuple: The ``BlobInfo`` of the blobs directly under ``prefix`` and the
+                sub-prefixes, as returned by ``StorageBackend.list_dir``.
+        """
+        storage = get_storage()
+        key = (storage.cache_id, prefix)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is not None and entry[0] > now:
+            return entry[1], entry[2]
+
+        blobs, prefixes = storage.list_dir(prefix)
+        with self._lock:
+            self._entries[key] = (now + self.ttl, blobs, prefixes)
+        return blobs, prefixes
+
+    def invalidate(self, dataset=None):
+        """
+        Drop cached listings.
+
+        Args:
+            dataset (str): Only drop the listing of this dataset (and the dataset
+                list, in case it is new). None drops everything.
+        """
+        stale = {f"{self.root}/", f"{self.root}/{dataset}/"}
+        with self._lock:
+            if dataset is None:
+                self._entries.clear()
+                return
+            for key in [key for key in self._entries if key[1] in stale]:
+                del self._entries[key]
+
+
+_catalog = None
+_catalog_lock = threading.Lock()
+
+
+def get_catalog():
+    """Return the process-wide dataset catalog shared by every Streamlit session."""
+    global _catalog
+    if _catalog is None:
+        with _catalog_lock:
+            if _catalog is None:
+                _catalog = DatasetCatalog()
+    return _catalog
@@ -0,0 +1,206 @@
+import os
+from io import BytesIO
+
+import pandas as pd
+
+# Explicit column types of the dataset files. Columns of the source CSVs that are
+# not listed here are stored with the type inferred from the data.
+SCHEMA = {
+    "full_path": "string",
+    "text": "string",
+    "audio_link": "string",
+    "raw_text": "string",
+    "multi_speaker": "bool",
+    "loud_noise": "bool",
+    "unclear": "bool",
+    "incomplete_sentence": "bool",
+    "edit_status": "bool",
+    "group": "int32",
+}
+
+# File format -> (file extension, content type)
+FORMATS = {
+    "csv": (".csv", "text/csv"),
+    "parquet": (".parquet", "application/vnd.apache.parquet"),
+}
+
+DEFAULT_COMPRESSION = "zstd"
+
+
+def file_extension(file_format):
+    """Return the file extension of a dataset file format ("csv" or "parquet")."""
+    if file_format not in FORMATS:
+        raise ValueError(f"Unknown file format '{file_format}'.")
+    return FORMATS[file_format][0]
+
+
+def content_type(file_format):
+    """Return the content type of a dataset file format."""
+    return FORMATS[file_format][1]
+
+
+def format_of(file_name):
+    """
+    Return the file format of a dataset file from its name.
+
+    Args:
+        file_name (str): The file name, e.g. "group_1.parquet".
+
+    Returns:
+        str or None: "csv", "parquet", or None for other files.
+    """
+    extension = os.path.splitext(file_name)[1]
+    for file_format, (format_extension, _) in FORMATS.items():
+        if extension == format_extension:
+            return file_format
+    return None
+
+
+def _arrow_schema(table):
+    import pyarrow as pa
+
+    types = {"string": pa.string(), "bool": pa.bool_(), "int32": pa.int32()}
+    fields = [
+        (
+            pa.field(field.name, types[SCHEMA[field.name]])
+            if field.name in SCHEMA
+            else field
+        )
+        for field in table.schema
+    ]
+    return pa.schema(fields)
+
+
+def serialize_frame(df, file_format="csv", compression=DEFAULT_COMPRESSION):
+    """
+    Serialize a DataFrame into the content of a dataset file.
+
+    Args:
+        df (DataFrame): The data to serialize.
+        file_format (str): "csv" or "parquet".
+        compression (str): Parquet compression codec.
+
+    Returns:
+        bytes: The file content.
+
+    Raises:
+        ImportError: If Parquet is requested and pyarrow is not installed.
+        ValueError: If the file format is unknown.
+    """
+    if file_format == "csv":
+        return df.to_csv(index=False).encode()
+    if file_format == "parquet":
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError as e:
+            raise ImportError("The parquet file format requires pyarrow.") from e
+
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        table = table.cast(_arrow_schema(table))
+        buffer = BytesIO()
+        pq.write_table(table, buffer, compression=compression)
+        return buffer.getvalue()
+    raise ValueError(f"Unknown file format '{file_format}'.")
+
+
+def deserialize_frame(data, file_format="csv", columns=None):
+    """
+    Read the content of a dataset file into a DataFrame.
+
+    Args:
+        data (bytes): The file content.
+        file_format (str): "csv" or "parquet".
+        columns (list): Only read these columns (column projection). None reads all.
+
+    Returns:
+        DataFrame: The data.
+
+    Raises:
+        ImportError: If Parquet is requested and pyarrow is not installed.
+        ValueError: If the file format is unknown.
+    """
+    if file_format == "csv":
+        usecols = (lambda column: column in columns) if columns is not None else None
+        return pd.read_csv(BytesIO(data), usecols=usecols)
+    if file_format == "parquet":
+        try:
+            import pyarrow.parquet as pq
+        except ImportError as e:
+            raise ImportError("The parquet file format requires pyarrow.") from e
+
+        parquet_file = pq.ParquetFile(BytesIO(data))
+        if columns is not None:
+            # Only the projected column chunks are decoded
+            names = parquet_file.schema_arrow.names
+            columns = [column for column in columns if column in names]
+        return parquet_file.read(columns=columns).to_pandas()
+    raise ValueError(f"Unknown file format '{file_format}'.")
+
+
+class FrameWriter:
+    """
+    Write a dataset file to a local path one DataFrame chunk at a time.
+
+    Only the current chunk is held in memory; CSV chunks are appended to the file
+    and Parquet chunks are written as row groups of a single file.
+    """
+
+    def __init__(self, path, file_format="csv", compression=DEFAULT_COMPRESSION):
+        """
+        Args:
+            path (str): The local file to write.
+            file_format (str): "csv" or "parquet".
+            compression (str): Parquet compression codec.
+
+        Raises:
+            ImportError: If Parquet is requested and pyarrow is not installed.
+            ValueError: If the file format is unknown.
+        """
+        file_extension(file_format)
+        self.path = path
+        self.file_format = file_format
+        self.compression = compression
+        self.rows = 0
+        self._file = None
+        self._writer = None
+        if file_format == "parquet":
+            try:
+                import pyarrow.parquet  # noqa: F401
+            except ImportError as e:
+                raise ImportError("The parquet file format requires pyarrow.") from e
+
+    def write(self, df):
+        """Append the rows of ``df``; every chunk must have the same columns."""
+        if self.file_format == "csv":
+            if self._file is None:
+                self._file = open(self.path, "w", newline="", encoding="utf-8")
+                df.iloc[:0].to_csv(self._file, index=False)
+            df.to_csv(self._file, index=False, header=False)
+        else:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+
+            table = pa.Table.from_pandas(df, preserve_index=False)
+            if self._writer is None:
+                schema = _arrow_schema(table)
+                self._writer = pq.ParquetWriter(
+                    self.path, schema, compression=self.compression
+                )
+            self._writer.write_table(table.cast(self._writer.schema))
+        self.rows += len(df)
+
+    def close(self):
+        """Finish the file. A writer that got no rows leaves no file behind."""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
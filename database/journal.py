@@ -0,0 +1,174 @@
+import json
+import math
+import time
+from uuid import uuid4
+
+import numpy as np
+
+from database.storage import get_storage
+
+# Columns annotators can change; only these are diffed and journaled
+EDITABLE_COLUMNS = [
+    "text",
+    "multi_speaker",
+    "loud_noise",
+    "unclear",
+    "incomplete_sentence",
+    "edit_status",
+]
+
+# A group journal is folded into its base file once it grows past either limit
+JOURNAL_COMPACT_SEGMENTS = 20
+JOURNAL_COMPACT_BYTES = 256 * 1024
+
+
+def journal_prefix(dataset, group):
+    """Return the storage prefix holding the journal segments of a group."""
+    return f"journal_files/{dataset}/group_{group}/"
+
+
+def plain_value(value):
+    """
+    Convert a cell value to a JSON friendly one: numpy scalars to Python, NaN to None.
+
+    Args:
+        value: The cell value.
+
+    Returns:
+        The value, as stored in a journal entry.
+    """
+    if hasattr(value, "item"):
+        value = value.item()
+    if isinstance(value, float) and math.isnan(value):
+        return None
+    return value
+
+
+def diff_group(base_df, edited_df, columns=EDITABLE_COLUMNS):
+    """
+    Compute the cell edits between two versions of the same group.
+
+    Rows are matched by position, which is stable for a group file.
+
+    Args:
+        base_df (DataFrame): The last saved version of the group.
+        edited_df (DataFrame): The edited version of the group.
+        columns (list): The columns to compare.
+
+    Returns:
+        list: Journal entries ``{"row", "column", "value", "ts"}``, one per changed cell.
+    """
+    ts = time.time()
+    entries = []
+    for column in columns:
+        if column not in edited_df.columns:
+            continue
+        new = edited_df[column].reset_index(drop=True)
+        old = base_df[column].reset_index(drop=True)
+        changed = new.ne(old) & ~(new.isna() & old.isna())
+        for row in np.flatnonzero(changed.to_numpy()):
+            entries.append(
+                {
+                    "row": int(row),
+                    "column": column,
+                    "value": plain_value(new.iloc[row]),
+                    "ts": ts,
+                }
+            )
+    return entries
+
+
+def append_journal(dataset, group, entries):
+    """
+    Append edits to the journal of a group as a new, create-only segment.
+
+    Args:
+        dataset (str): The dataset name.
+        group (int): The group number.
+        entries (list): Journal entries, as returned by ``diff_group``.
+
+    Returns:
+        BlobInfo: The written segment, or None if there was nothing to write.
+    """
+    if not entries:
+        return None
+    payload = "".join(json.dumps(entry, ensure_ascii=False) + "\n" for entry in entries)
+    segment = (
+        f"{journal_prefix(dataset, group)}{time.time_ns():020d}-{uuid4().hex[:8]}.jsonl"
+    )
+    return get_storage().write(
+        segment,
+        payload.encode(),
+        content_type="application/x-ndjson",
+        if_generation_match=0,
+    )
+
+
+def list_journal(dataset, group):
+    """
+    List the journal segments of a group, oldest first.
+
+    Returns:
+        list: ``BlobInfo`` of every segment.
+    """
+    segments = get_storage().list_blobs(prefix=journal_prefix(dataset, group))
+    return sorted(segments, key=lambda blob: blob.name)
+
+
+def read_journal(dataset, group, segments=None):
+    """
+    Read the journal entries of a group, in the order they were written.
+
+    Args:
+        dataset (str): The dataset name.
+        group (int): The group number.
+        segments (list): The segments to read. Defaults to ``list_journal``.
+
+    Returns:
+        list: The journal entries.
+    """
+    storage = get_storage()
+    if segments is None:
+        segments = list_journal(dataset, group)
+    entries = []
+    for segment in segments:
+        data = storage.read(segment.name)
+        if data:
+            entries.extend(
+                json.loads(line) for line in data.decode().splitlines() if line
+            )
+    return entries
+
+
+def replay_journal(df, entries):
+    """
+    Apply journal entries to a group, later entries winning.
+
+    Args:
+        df (DataFrame): The base version of the group; it is modified in place.
+        entries (list): Journal entries, oldest first.
+
+    Returns:
+        DataFrame: ``df``, with the edits applied.
+    """
+    latest = {}
+    for entry in entries:
+        if entry["row"] < len(df) and entry["column"] in df.columns:
+            latest.setdefault(entry["column"], {})[entry["row"]] = entry["value"]
+
+    # One positional assignment per column
+    for column, values in latest.items():
+        rows = np.fromiter(values.keys(), dtype=np.int64)
+        column_values = [
+            np.nan if value is None else value for value in values.values()
+        ]
+        df.iloc[rows, df.columns.get_loc(column)] = column_values
+    return df
+
+
+def journal_needs_compaction(segments):
+    """Return True if the journal segments exceed the compaction limits."""
+    return (
+        len(segments) >= JOURNAL_COMPACT_SEGMENTS
+        or sum(segment.size for segment in segments) >= JOURNAL_COMPACT_BYTES
+    )
@@ -0,0 +1,175 @@
+import json
+import time
+
+from database.storage import ConflictError, get_storage
+from database.cache import get_blob_cache
+
+FLAG_COLUMNS = ["multi_speaker", "loud_noise", "unclear", "incomplete_sentence"]
+
+MANIFEST_NAME = "manifest.json"
+
+
+def manifest_path(dataset):
+    """Return the storage path of the manifest of a dataset."""
+    return f"csv_files/{dataset}/{MANIFEST_NAME}"
+
+
+def empty_manifest():
+    """Return a manifest without any group."""
+    return {"version": 1, "splits": {}, "groups": {}}
+
+
+def group_entry(df, info=None, previous=None):
+    """
+    Summarize a group for the manifest.
+
+    Args:
+        df (DataFrame): The current content of the group.
+        info (BlobInfo): The stored group file. None keeps the generation and
+            checksum of ``previous`` (the edits are still in the journal).
+        previous (dict): The current manifest entry of the group, if any.
+
+    Returns:
+        dict: Row count, edit status, generation and checksum of the group file,
+            and the number of rows with each flag set.
+    """
+    previous = previous or {}
+    return {
+        "rows": int(len(df)),
+        "edit_status": bool(len(df)) and bool(df["edit_status"].all()),
+        "generation": info.generation if info else previous.get("generation"),
+        "checksum": info.md5_hash if info else previous.get("checksum"),
+        "flags": {
+            column: int(df[column].sum()) for column in FLAG_COLUMNS if column in df
+        },
+        "updated": time.time(),
+    }
+
+
+def group_entries(df, infos):
+    """
+    Summarize every group of a dataset for the manifest, in one grouped pass.
+
+    Args:
+        df (DataFrame): The rows of the dataset, with their "group" column.
+        infos (dict): Group number -> ``BlobInfo`` of the stored group file.
+
+    Returns:
+        dict: Group number (as a string) -> manifest entry, as built by ``group_entry``.
+    """
+    grouped = df.groupby("group", sort=True)
+    rows = grouped.size()
+    done = grouped["edit_status"].all()
+    flags = grouped[[column for column in FLAG_COLUMNS if column in df]].sum()
+    updated = time.time()
+    entries = {}
+    for group_num, count in rows.items():
+        info = infos.get(int(group_num))
+        entries[str(group_num)] = {
+            "rows": int(count),
+            "edit_status": bool(count) and bool(done[group_num]),
+            "generation": info.generation if info else None,
+            "checksum": info.md5_hash if info else None,
+            "flags": {
+                column: int(value) for column, value in flags.loc[group_num].items()
+            },
+            "updated": updated,
+        }
+    return entries
+
+
+def read_manifest(dataset):
+    """
+    Read the manifest of a dataset through the shared blob cache.
+
+    Args:
+        dataset (str): The name of the dataset folder.
+
+    Returns:
+        tuple: The manifest dict and its generation, or ``(None, None)`` if the
+            dataset has no manifest yet.
+    """
+    data, generation = get_blob_cache().get_with_generation(manifest_path(dataset))
+    if data is None:
+        return None, None
+    return json.loads(data), generation
+
+
+def write_manifest(dataset, manifest, if_generation_match=None):
+    """
+    Write the manifest of a dataset.
+
+    Args:
+        dataset (str): The name of the dataset folder.
+        manifest (dict): The manifest.
+        if_generation_match (int): Only write if the stored manifest has this
+            generation; 0 means it must not exist.
+
+    Raises:
+        ConflictError: If the manifest changed since ``if_generation_match``.
+
+    Returns:
+        int: The generation of the written manifest.
+    """
+    path = manifest_path(dataset)
+    data = json.dumps(manifest, sort_keys=True).encode()
+    info = get_storage().write(
+        path,
+        data,
+        content_type="application/json",
+        if_generation_match=if_generation_match,
+    )
+    get_blob_cache().put(path, data, info.generation)
+    return info.generation
+
+
+def update_manifest(dataset, update, retries=10):
+    """
+    Atomically read-modify-write the manifest of a dataset.
+
+    The write is conditional on the generation that was read, and retried on a
+    concurrent update, so updates from several sessions are never lost.
+
+    Args:
+        dataset (str): The name of the dataset folder.
+        update (callable): Called with the manifest dict, modifies it in place.
+        retries (int): The number of attempts before giving up.
+
+    Raises:
+        ConflictError: If the manifest kept changing for every attempt.
+
+    Returns:
+        dict: The written manifest.
+    """
+    for _ in range(retries):
+        manifest, generation = read_manifest(dataset)
+        if manifest is None:
+            manifest, generation = empty_manifest(), 0
+        update(manifest)
+        try:
+            write_manifest(dataset, manifest, if_generation_match=generation)
+            return manifest
+        except ConflictError:
+            continue
+    raise ConflictError(f"{manifest_path(dataset)} kept changing, update abandoned.")
+
+
+def update_group(dataset, group_num, df, info=None):
+    """
+    Update the manifest entry of one group.
+
+    Args:
+        dataset (str): The name of the dataset folder.
+        group_num (int): The group number.
+        df (DataFrame): The current content of the group.
+        info (BlobInfo): The stored group file, if it was just written.
+
+    Returns:
+        dict: The written manifest.
+    """
+
+    def update(manifest):
+        groups = manifest.setdefault("groups", {})
+        groups[str(group_num)] = group_entry(df, info, groups.get(str(group_num)))
+
+    return update_manifest(dataset, update)
@@ -0,0 +1,213 @@
+import time
+import random
+import threading
+
+
+class SaveJob:
+    """The pending save of one group: the edits between ``base_df`` and ``edited_df``."""
+
+    def __init__(self, dataset, group_num, base_df, edited_df, done=False):
+        self.dataset = dataset
+        self.group_num = group_num
+        self.base_df = base_df
+        self.edited_df = edited_df
+        self.done = done
+        self.enqueued_at = time.time()
+        self.attempts = 0
+        self.error = None
+        self.not_before = 0.0
+
+    @property
+    def key(self):
+        return (self.dataset, self.group_num)
+
+    def merge(self, newer):
+        """
+        Fold a newer save of the same group into this one.
+
+        The edits are deltas against ``base_df``, so the merged job keeps the older
+        base and the newer edited version: a single save then covers both. The
+        attempts and backoff of this job are kept, so a save that keeps failing is
+        not retried sooner, nor more often, because it was edited again.
+        """
+        merged = SaveJob(
+            self.dataset,
+            self.group_num,
+            self.base_df,
+            newer.edited_df,
+            self.done or newer.done,
+        )
+        merged.enqueued_at = max(self.enqueued_at, newer.enqueued_at)
+        merged.attempts = max(self.attempts, newer.attempts)
+        merged.not_before = max(self.not_before, newer.not_before)
+        merged.error = self.error
+        return merged
+
+
+class SaveQueue:
+    """
+    Save group edits on a background thread, so the editor never waits for storage.
+
+    Saves are queued per group. A save of a group that is still waiting is merged
+    into the waiting one, so only the latest version is uploaded. Failed saves are
+    retried with exponential backoff; a save that keeps failing is kept, reported
+    by ``status`` and merged into the next save of its group (or retried with
+    ``retry_failed``), so no edit is dropped.
+    """
+
+    def __init__(self, save, retries=5, backoff=1.0, max_backoff=30.0, on_saved=None):
+        """
+        Args:
+            save (callable): Called as ``save(dataset, group_num, base_df, edited_df,
+                done)`` on the worker thread to persist one job.
+            retries (int): The number of attempts before a save is reported as failed.
+            backoff (float): Seconds before the first retry, doubled at every attempt.
+            max_backoff (float): The longest wait between two attempts.
+            on_saved (callable): Called as ``on_saved(dataset, group_num, enqueued_at)``
+                after a job is saved; ``enqueued_at`` is the time the latest edits it
+                holds were queued.
+        """
+        self.save = save
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.on_saved = on_saved
+        self._pending = {}  # (dataset, group) -> SaveJob waiting to run
+        self._running = {}  # (dataset, group) -> SaveJob being saved
+        self._failed = {}  # (dataset, group) -> SaveJob that ran out of retries
+        self._cond = threading.Condition()
+        self._worker = None
+
+    def enqueue(self, dataset, group_num, base_df, edited_df, done=False):
+        """
+        Queue the edits of a group.
+
+        Args:
+            dataset (str): The dataset name.
+            group_num (int): The group number.
+            base_df (DataFrame): The group as of the previous save.
+            edited_df (DataFrame): The edited group. It is copied.
+            done (bool): The group was marked done.
+        """
+        job = SaveJob(dataset, group_num, base_df, edited_df.copy(), done)
+        with self._cond:
+            # A failed save of the group is retried with the new edits, as by
+            # retry_failed; a waiting one keeps its attempts. Both keep their base
+            failed = self._failed.pop(job.key, None)
+            if failed is not None:
+                failed.attempts = 0
+                failed.not_before = 0.0
+                job = failed.merge(job)
+            if job.key in self._pending:
+                job = self._pending.pop(job.key).merge(job)
+            self._pending[job.key] = job
+            self._start()
+            self._cond.notify_all()
+
+    def retry_failed(self):
+        """Queue the saves that ran out of retries again."""
+        with self._cond:
+            for key, job in list(self._failed.items()):
+                del self._failed[key]
+                job.attempts = 0
+                job.not_before = 0.0
+                self._pending[key] = job
+            self._start()
+            self._cond.notify_all()
+
+    def status(self):
+        """
+        Summarize the queue.
+
+        Returns:
+            dict: ``pending`` (saves waiting or running) and ``failed`` (a list of
+                ``(dataset, group, error)`` for saves that ran out of retries).
+        """
+        with self._cond:
+            return {
+                "pending": len(self._pending) + len(self._running),
+                "failed": [
+                    (job.dataset, job.group_num, job.error)
+                    for job in self._failed.values()
+                ],
+            }
+
+    def flush(self, timeout=None):
+        """
+        Wait until every queued save has run.
+
+        Args:
+            timeout (float): Seconds to wait at most. None waits as long as needed.
+
+        Returns:
+            bool: True if nothing is left to save (failed saves excepted).
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while self._pending or self._running:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+            return True
+
+    def _start(self):
+        # Called with the lock held
+        if self._worker is None:
+            self._worker = threading.Thread(
+                target=self._run, name="save-queue", daemon=True
+            )
+            self._worker.start()
+
+    def _next_job(self):
+        # Wait for the earliest job that is due; None once the queue is empty
+        with self._cond:
+            while True:
+                if not self._pending:
+                    self._worker = None
+                    self._cond.notify_all()
+                    return None
+                job = min(self._pending.values(), key=lambda job: job.not_before)
+                delay = job.not_before - time.monotonic()
+                if delay <= 0:
+                    del self._pending[job.key]
+                    self._running[job.key] = job
+                    return job
+                self._cond.wait(delay)
+
+    def _run(self):
+        while True:
+            job = self._next_job()
+            if job is None:
+                return
+            try:
+                self.save(
+                    job.dataset, job.group_num, job.base_df, job.edited_df, job.done
+                )
+                if self.on_saved is not None:
+                    self.on_saved(job.dataset, job.group_num, job.enqueued_at)
+                error = None
+            except Exception as e:
+                error = e
+                print(f"{job.dataset}/group_{job.group_num} : save failed: {e}")
+
+            with self._cond:
+                del self._running[job.key]
+                if error is not None:
+                    job.attempts += 1
+                    job.error = error
+                    newer = self._pending.pop(job.key, None)
+                    if newer is not None:
+                        # Retry the failed edits together with the newer ones
+                        job = job.merge(newer)
+                    if job.attempts >= self.retries:
+                        self._failed[job.key] = job
+                    else:
+                        delay = min(
+                            self.max_backoff, self.backoff * 2 ** (job.attempts - 1)
+                        )
+                        job.not_before = time.monotonic() + delay * random.uniform(
+                            0.8, 1.2
+                        )
+                        self._pending[job.key] = job
+                self._cond.notify_all()
@@ -0,0 +1,275 @@
+import os
+import time
+import base64
+import hashlib
+import threading
+from collections import deque
+from itertools import islice
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from database.storage import google_crc32c, md5_base64, crc32c_base64
+
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+class UploadCheckpoint:
+    """
+    Append-only record of the files that finished uploading.
+
+    Each line holds ``<size>\\t<mtime_ns>\\t<name>``, so a file that changed on
+    disk after it was uploaded is not considered done anymore.
+    """
+
+    def __init__(self, path):
+        """
+        Args:
+            path (str): The local checkpoint file. It is created on first use.
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        self._done = set()
+        if path and os.path.isfile(path):
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    parts = line.rstrip("\n").split("\t", 2)
+                    if len(parts) == 3:
+                        self._done.add((parts[2], int(parts[0]), int(parts[1])))
+
+    @staticmethod
+    def _entry(name, file_path):
+        stat = os.stat(file_path)
+        return name, stat.st_size, stat.st_mtime_ns
+
+    def is_done(self, name, file_path):
+        """Return True if ``file_path`` was already uploaded as ``name`` and did not change since."""
+        return self._entry(name, file_path) in self._done
+
+    def mark_done(self, name, file_path):
+        """Record that ``file_path`` finished uploading as ``name``."""
+        entry = self._entry(name, file_path)
+        with self._lock:
+            self._done.add(entry)
+            if self.path:
+                with open(self.path, "a", encoding="utf-8") as f:
+                    f.write(f"{entry[1]}\t{entry[2]}\t{entry[0]}\n")
+
+
+class TransferStats:
+    """Counters for a batch of transfers, used to report throughput."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.files = 0
+        self.bytes = 0
+        self.skipped = 0
+        self.failed = []
+        self._lock = threading.Lock()
+
+    def add(self, size):
+        with self._lock:
+            self.files += 1
+            self.bytes += size
+
+    def fail(self, name, error):
+        with self._lock:
+            self.failed.append((name, error))
+
+    def report(self):
+        """
+        Summarize the transfers.
+
+        Returns:
+            str: Files and megabytes transferred, with throughput in files/s and MB/s.
+        """
+        elapsed = max(time.perf_counter() - self.started, 1e-9)
+        mb = self.bytes / (1024 * 1024)
+        return (
+            f"{self.files} files ({mb:.1f} MB) in {elapsed:.1f}s: "
+            f"{self.files / elapsed:.1f} files/s, {mb / elapsed:.2f} MB/s, "
+            f"{self.skipped} skipped, {len(self.failed)} failed"
+        )
+
+
+def run_bounded(tasks, worker, max_workers=8, progress_every=100):
+    """
+    Run ``worker`` over ``tasks`` on a thread pool with a bounded number of pending tasks.
+
+    Tasks are submitted lazily, at most ``2 * max_workers`` at a time, so very
+    large task lists are never materialized as futures all at once.
+
+    Args:
+        tasks (iterable): The task arguments, passed one by one to ``worker``.
+        worker (callable): Called with one task; returns the number of bytes transferred.
+        max_workers (int): The number of concurrent transfers.
+        progress_every (int): Print the throughput after this many finished tasks.
+
+    Returns:
+        TransferStats: The counters of the batch. Failed tasks are recorded, not raised.
+    """
+    stats = TransferStats()
+    max_pending = max(1, max_workers) * 2
+
+    def _collect(done):
+        for future in done:
+            task = pending.pop(future)
+            try:
+                stats.add(future.result())
+            except Exception as e:
+                stats.fail(task, e)
+                print(f"{task} : upload failed: {e}")
+            if progress_every and stats.files and stats.files % progress_every == 0:
+                print(stats.report())
+
+    pending = {}
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+        for task in tasks:
+            if len(pending) >= max_pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                _collect(done)
+            pending[executor.submit(worker, task)] = task
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            _collect(done)
+
+    return stats
+
+
+def file_hashes(file_path, chunk_size=HASH_CHUNK_SIZE):
+    """
+    Compute the MD5 and CRC32C of a local file, streamed from disk in chunks.
+
+    Args:
+        file_path (str): The local file.
+        chunk_size (int): The number of bytes read at a time.
+
+    Returns:
+        tuple: The base64 encoded MD5 digest and CRC32C checksum, in the format
+            reported by Cloud Storage. The CRC32C is None without ``google-crc32c``.
+    """
+    md5 = hashlib.md5()
+    crc = google_crc32c.Checksum() if google_crc32c is not None else None
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            md5.update(chunk)
+            if crc is not None:
+                crc.update(chunk)
+    return (
+        base64.b64encode(md5.digest()).decode(),
+        base64.b64encode(crc.digest()).decode() if crc is not None else None,
+    )
+
+
+def hash_files(file_paths, max_workers=8):
+    """
+    Compute ``file_hashes`` for many local files in parallel.
+
+    Args:
+        file_paths (dict): Blob names mapped to local file paths.
+        max_workers (int): The number of files hashed concurrently.
+
+    Returns:
+        dict: Blob names mapped to ``(md5, crc32c)`` tuples.
+    """
+    names = list(file_paths)
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+        hashes = executor.map(lambda name: file_hashes(file_paths[name]), names)
+        return dict(zip(names, hashes))
+
+
+def content_hashes(data):
+    """Return the ``(md5, crc32c)`` tuple of in-memory content, like ``file_hashes``."""
+    return md5_base64(data), crc32c_base64(data)
+
+
+def same_content(hashes, info):
+    """
+    Check whether local content matches a stored blob.
+
+    Args:
+        hashes (tuple): The ``(md5, crc32c)`` of the local content.
+        info (BlobInfo): The stored blob, or None.
+
+    Returns:
+        bool: True if a checksum known on both sides is equal.
+    """
+    if info is None:
+        return False
+    md5, crc = hashes
+    if md5 and info.md5_hash:
+        return md5 == info.md5_hash
+    # Composite objects only carry a CRC32C
+    if crc and info.crc32c:
+        return crc == info.crc32c
+    return False
+
+
+class SyncPlan:
+    """The objects a sync would transfer, split into new, changed and unchanged."""
+
+    def __init__(self, local_hashes, remote, sizes):
+        """
+        Args:
+            local_hashes (dict): Blob names mapped to local ``(md5, crc32c)`` tuples.
+            remote (dict): Blob names mapped to the ``BlobInfo`` already stored.
+            sizes (dict): Blob names mapped to the local size in bytes.
+        """
+        self.new = []
+        self.changed = []
+        self.unchanged = []
+        self.sizes = sizes
+        for name, hashes in local_hashes.items():
+            info = remote.get(name)
+            if info is None:
+                self.new.append(name)
+            elif same_content(hashes, info):
+                self.unchanged.append(name)
+            else:
+                self.changed.append(name)
+
+    @property
+    def to_transfer(self):
+        """The names of the new and changed objects."""
+        return self.new + self.changed
+
+    def summary(self):
+        """
+        Summarize what the sync transfers.
+
+        Returns:
+            str: The counts and sizes of new, changed and unchanged objects.
+        """
+
+        def mb(names):
+            return sum(self.sizes.get(name, 0) for name in names) / (1024 * 1024)
+
+        return (
+            f"{len(self.new)} new ({mb(self.new):.1f} MB), "
+            f"{len(self.changed)} changed ({mb(self.changed):.1f} MB), "
+            f"{len(self.unchanged)} unchanged"
+        )
+
+
+def ordered_map(fn, items, max_workers=8):
+    """
+    Apply ``fn`` to ``items`` concurrently and yield the results in input order.
+
+    At most ``2 * max_workers`` results are computed ahead of the consumer, so
+    memory stays bounded however many items there are.
+
+    Args:
+        fn (callable): Called with one item.
+        items (iterable): The inputs.
+        max_workers (int): The number of concurrent calls.
+
+    Yields:
+        The result of ``fn`` for each item, in the order of ``items``.
+    """
+    window = max(1, max_workers) * 2
+    items = iter(items)
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+        pending = deque(executor.submit(fn, item) for item in islice(items, window))
+        while pending:
+            result = pending.popleft().result()
+            for item in islice(items, 1):
+                pending.append(executor.submit(fn, item))
+            yield result
@@ -1,14 +1,50 @@
 import streamlit as st
 import pandas as pd
+import numpy as np
 import streamlit.components.v1 as components
-import io
 import time
+from collections import OrderedDict
 from database import (
-    get_csv_file,
+    read_dataset_file,
     name_csv_list,
-    name_csv_group_list,
-    upload_edited_csv_file,
+    get_manifest,
+    dataset_format,
+    load_group,
+    save_group,
+    SaveQueue,
+    get_autosave_log,
+    replay_journal,
+    EDITABLE_COLUMNS,
+    audio_bucket_path,
+    get_audio_cache,
+    prefetch_group_audio,
 )
+from annotator import annotator
+
+# Columns the editor pages need; other dataset columns are not decoded (Parquet)
+PAGE_COLUMNS = ["audio_link", "full_path", "raw_text", "group"] + EDITABLE_COLUMNS
+
+# st.fragment from Streamlit 1.37, st.experimental_fragment from 1.33
+FRAGMENT = getattr(st, "fragment", None) or getattr(st, "experimental_fragment", None)
+
+# Flag column, widget key suffix and label of the toggles of an utterance card
+FLAG_WIDGETS = [
+    ("multi_speaker", "_m", ":blue[มีเสียงพูดหลายคน]"),
+    ("loud_noise", "_l", ":blue[มี noise ดัง]"),
+    ("unclear", "_u", ":blue[ฟังไม่ออก/ไม่แน่ใจ]"),
+    ("incomplete_sentence", "_i", ":blue[มีเสียงต้นท้ายประโยค / พูดไม่ครบประโยค]"),
+]
+
+# Rows of a page of the Pages and Keyboard views
+ROWS_PER_PAGE = 10
+
+# Datasets kept loaded per session, least recently used evicted first, and
+# groups kept loaded per dataset
+SESSION_DATASETS = 3
+SESSION_GROUPS = 8
+
+# Edits kept only in the local autosave log are saved to storage after this many seconds
+AUTOSAVE_DEBOUNCE = 10
 
 st.set_page_config(
     page_title="Editing CSV",
@@ -17,7 +53,127 @@ st.set_page_config(
 )
 
 
-def load_data_for_page(data_frame, page_number, rows_per_page, selected_set):
+def build_group_index(data_frame):
+    """
+    Map every group of a DataFrame to the positions of its rows, in one pass.
+
+    Built once per loaded DataFrame, so paging and saving a group take its rows by
+    position instead of scanning the whole "group" column on every rerun.
+
+    Args:
+        data_frame (DataFrame): The loaded rows, with a "group" column.
+
+    Returns:
+        dict: Group number -> array of row positions, in row order.
+    """
+    return {
+        int(group_num): positions
+        for group_num, positions in data_frame.groupby("group").indices.items()
+    }
+
+
+def group_positions(selected_set):
+    """Return the row positions of a group in the session DataFrame."""
+    return current_group()["group_index"].get(selected_set, np.empty(0, dtype=np.intp))
+
+
+def dataset_state(csv_name):
+    """
+    Get the session state of a dataset, loading it on first use.
+
+    Datasets are kept in a per-session LRU of ``SESSION_DATASETS`` entries, so going
+    back to a dataset viewed earlier does not read it again.
+
+    Args:
+        csv_name (str): The name of the dataset on Firebase Storage.
+
+    Returns:
+        dict: ``group_sizes`` (group number -> rows), ``done_set`` (done group
+            numbers, None if the dataset has no groups), ``format`` (storage format
+            of its files) and ``groups`` (group number -> group state, see
+            ``group_state``).
+    """
+    datasets = st.session_state.setdefault("datasets", OrderedDict())
+    if csv_name in datasets:
+        datasets.move_to_end(csv_name)
+        return datasets[csv_name]
+
+    # Only the manifest is read here; groups are loaded once selected
+    datasets[csv_name] = {
+        "group_sizes": get_group_row_counts(csv_name),
+        "done_set": get_group_numbers_with_edit_status_true(csv_name),
+        "format": dataset_format(csv_name),
+        "groups": OrderedDict(),
+    }
+    while len(datasets) > SESSION_DATASETS:
+        evicted_name, evicted = datasets.popitem(last=False)
+        for group_num, group in evicted["groups"].items():
+            save_evicted_group(evicted_name, group_num, group)
+    return datasets[csv_name]
+
+
+def group_state(csv_name, group_num):
+    """
+    Get the session state of a group, loading it on first use.
+
+    Args:
+        csv_name (str): The name of the dataset on Firebase Storage.
+        group_num (int): The group number.
+
+    Returns:
+        dict: ``group_df``, ``group_index``, ``saved_group_df``, ``page_number``
+            and ``dirty_rows`` (positions of the rows edited since the last save) of
+            the group, or None if the group could not be loaded.
+    """
+    groups = dataset_state(csv_name)["groups"]
+    if group_num in groups:
+        groups.move_to_end(group_num)
+        return groups[group_num]
+
+    state = load_selected_group(csv_name, group_num)
+    if state is None:
+        return None
+    groups[group_num] = state
+    while len(groups) > SESSION_GROUPS:
+        evicted_num, evicted = groups.popitem(last=False)
+        save_evicted_group(csv_name, evicted_num, evicted)
+    return state
+
+
+def save_evicted_group(csv_name, group_num, group):
+    """
+    Queue the unsaved edits of a group dropped from the session LRU.
+
+    ``flush_autosave`` only sees the groups still in the session, so edits left in
+    an evicted group would otherwise wait in the autosave log until the group is
+    opened again.
+    """
+    if group.get("dirty_since") is not None:
+        enqueue_group_save(csv_name, group_num, group, group["group_df"])
+
+
+def invalidate_group(csv_name, group_num):
+    """Drop the loaded state of one group, so it is read again when selected."""
+    datasets = st.session_state.get("datasets", {})
+    if csv_name in datasets:
+        datasets[csv_name]["groups"].pop(group_num, None)
+
+
+def current_dataset():
+    """Return the session state of the selected dataset."""
+    return dataset_state(st.session_state.selected_csv_file)
+
+
+def current_group():
+    """Return the session state of the selected group."""
+    return group_state(
+        st.session_state.selected_csv_file, st.session_state.selected_set
+    )
+
+
+def load_data_for_page(
+    data_frame, page_number, rows_per_page, selected_set, group_index=None
+):
     """
     Load data from a DataFrame for a specific page.
 
@@ -26,6 +182,8 @@ def load_data_for_page(data_frame, page_number, rows_per_page, selected_set):
         page_number (int): The page number to load.
         rows_per_page (int): The number of rows per page.
         selected_set (int): The selected set/group number.
+        group_index (dict): The index of ``data_frame`` from ``build_group_index``.
+            Only the rows of the page are then touched.
 
     Returns:
         DataFrame: A subset of the DataFrame containing data for the specified page.
@@ -34,15 +192,16 @@ def load_data_for_page(data_frame, page_number, rows_per_page, selected_set):
         ValueError: If page_number or rows_per_page is negative, or if selected_set is not found in the DataFrame.
     """
     try:
-        # Filter the DataFrame based on the selected set/group
-        df = data_frame[data_frame["group"] == selected_set].iloc[:]
+        if group_index is None:
+            group_index = build_group_index(data_frame)
+        positions = group_index.get(selected_set, np.empty(0, dtype=np.intp))
 
         # Calculate start and end indices for the specified page
         start_index = page_number * rows_per_page
         end_index = (page_number + 1) * rows_per_page
 
         # Return the subset of the DataFrame for the specified page
-        return df.iloc[start_index:end_index]
+        return data_frame.iloc[positions[start_index:end_index]]
 
     except Exception as e:
         print("An error occurred:", e)
@@ -63,112 +222,302 @@ def edit_status_done(selected_set):
     """
     try:
         # Mark the edit status as done for the selected set/group
-        st.session_state.concatenated_df.loc[
-            st.session_state.concatenated_df["group"] == selected_set, "edit_status"
-        ] = True
+        group_df = current_group()["group_df"]
+        positions = group_positions(selected_set)
+        column = group_df.columns.get_loc("edit_status")
+        group_df.iloc[positions, column] = True
+
+        # Only the edit_status cells (and any unsaved edit) are sent
+        if not handle_next_page(done=True):
+            # Keep the group editable, the save was rejected
+            group_df.iloc[positions, column] = False
+            return
+
+        # Only the finished group is invalidated; the dataset stays loaded
+        csv_name = st.session_state.selected_csv_file
+        done_set = current_dataset()["done_set"]
+        if done_set is not None and selected_set not in done_set:
+            done_set.append(selected_set)
+        invalidate_group(csv_name, selected_set)
+        del st.session_state.selected_set
+        st.session_state.group_select = None
 
-        handle_next_page()
+    except Exception as e:
+        print("An error occurred:", e)
 
-        # Clear session state
-        st.session_state.clear()
+
+def get_save_queue():
+    """Return the background save queue of the session, created on first use."""
+    if "save_queue" not in st.session_state:
+        # Saved edits are dropped from the local autosave log
+        st.session_state.save_queue = SaveQueue(
+            save_group, on_saved=get_autosave_log().clear
+        )
+    return st.session_state.save_queue
+
+
+def autosave_edits(edits):
+    """
+    Append edits of the selected group to the local autosave log and mark their
+    rows dirty.
+
+    The log is a local SQLite WAL, so the edits survive a refresh or a restart
+    without a network round trip; they are saved to storage by the next page change
+    or by ``flush_autosave``. Every write to the group DataFrame goes through here,
+    so only groups with dirty rows are saved.
+
+    Args:
+        edits (list): ``(index, column, value)`` tuples of the edited cells.
+
+    Returns:
+        None
+    """
+    try:
+        if not edits:
+            return
+        group = current_group()
+        df = group["group_df"]
+        entries = [
+            {"row": df.index.get_loc(index), "column": column, "value": value}
+            for index, column, value in edits
+        ]
+        get_autosave_log().record(
+            st.session_state.selected_csv_file, st.session_state.selected_set, entries
+        )
+        group["dirty_rows"].update(entry["row"] for entry in entries)
+        group.setdefault("dirty_since", time.time())
 
     except Exception as e:
         print("An error occurred:", e)
 
 
-def save_edited_csv(data_frame, csv_path):
+def flush_autosave():
     """
-    Save edited CSV data to Firebase Storage.
+    Save the groups of the session whose autosaved edits are older than
+    ``AUTOSAVE_DEBOUNCE`` seconds.
+
+    Returns:
+        None
+    """
+    now = time.time()
+    # Queued straight from the group states, so the session LRU is left as it is
+    for csv_name, dataset in list(st.session_state.get("datasets", {}).items()):
+        for group_num, group in list(dataset["groups"].items()):
+            dirty_since = group.get("dirty_since")
+            if dirty_since is not None and now - dirty_since >= AUTOSAVE_DEBOUNCE:
+                enqueue_group_save(csv_name, group_num, group, group["group_df"])
+
+
+def enqueue_group_save(csv_name, group_num, group, data_frame, done=False):
+    """
+    Queue the edits of a group on the background save queue.
 
     Args:
-        data_frame (DataFrame): The DataFrame containing the edited CSV data.
-        csv_path (str): The path of the CSV file on Firebase Storage.
+        csv_name (str): The name of the dataset on Firebase Storage.
+        group_num (int): The group number.
+        group (dict): The group state (see ``group_state``).
+        data_frame (DataFrame): The edited group.
+        done (bool): The group was marked done.
 
     Returns:
         None
+    """
+    get_save_queue().enqueue(
+        csv_name, group_num, group["saved_group_df"], data_frame, done
+    )
+
+    # The queued version is the base of the next delta
+    group["saved_group_df"] = data_frame[EDITABLE_COLUMNS].copy()
+    group["dirty_rows"].clear()
+    group.pop("dirty_since", None)
+
+
+def save_edited_csv(data_frame, csv_name, selected_set, done=False):
+    """
+    Queue the edits of a group to be saved to Firebase Storage as a delta journal entry.
+
+    Only the cells changed since the last save are uploaded, and nothing is queued
+    when no row of the group is dirty. The upload runs on the background save queue
+    of the session, so the page changes right away.
+
+    Args:
+        data_frame (DataFrame): The DataFrame containing the edited group data.
+        csv_name (str): The name of the dataset on Firebase Storage.
+        selected_set (int): The group number.
+        done (bool): The group was marked done. Always queued, since the
+            ``edit_status`` cells changed.
+
+    Returns:
+        bool: True if the edits were queued or there was nothing to save.
 
     Raises:
-        ValueError: If the CSV path is None or empty.
-        IOError: If there are issues saving the edited CSV data to Firebase Storage.
+        ValueError: If the CSV name is None or empty.
     """
     try:
-        edited_csv = data_frame.to_csv(index=False)
+        group = group_state(csv_name, selected_set)
+        if not group["dirty_rows"] and not done:
+            # Untouched page: nothing to upload
+            return True
 
-        upload_edited_csv_file(edited_csv, csv_path)
+        enqueue_group_save(csv_name, selected_set, group, data_frame, done)
+        return True
 
     except Exception as e:
         print("An error occurred:", e)
+        return False
+
+
+def render_save_status():
+    """
+    Show the state of the background saves: pending, failed (with a retry button)
+    or all saved.
+
+    Returns:
+        None
+    """
+    flush_autosave()
+    status = get_save_queue().status()
+    if status["failed"]:
+        sets = ", ".join(str(group_num) for _, group_num, _ in status["failed"])
+        st.error(f"Saving set {sets} failed.", icon="⚠️")
+        st.button("Retry", key="retry_saves", on_click=get_save_queue().retry_failed)
+    elif status["pending"]:
+        st.caption(f":orange[Saving {status['pending']} set(s)...]")
+    else:
+        st.caption(":green[All changes saved]")
+
+
+if FRAGMENT is not None:
+    # Refreshes on its own while the rest of the page stays as it is
+    render_save_status = FRAGMENT(run_every=2)(render_save_status)
 
 
 def handle_selected_file():
     """
-    Handle the selection of a file by clearing the session state.
+    Handle the selection of another dataset by resetting the selected group.
+
+    The loaded datasets stay in the session LRU (see ``dataset_state``).
 
     Returns:
         None
     """
     try:
-        # Clear session state
-        st.session_state.clear()
+        st.session_state.pop("selected_set", None)
+        st.session_state.group_select = None
 
     except Exception as e:
         print("An error occurred:", e)
 
 
-def handle_next_page():
+def handle_selected_group():
     """
-    Handle the transition to the next page by saving edited CSV data and updating session state.
+    Handle the selection of another group. Groups loaded earlier are reused, with
+    the page they were left on.
 
     Returns:
         None
     """
+    try:
+        st.session_state.pop("selected_set", None)
+
+    except Exception as e:
+        print("An error occurred:", e)
+
+
+def handle_next_page(done=False):
+    """
+    Handle the transition to the next page by saving edited CSV data and updating session state.
+
+    The save is queued (see ``save_edited_csv``); its progress is shown by
+    ``render_save_status``.
+
+    Args:
+        done (bool): The group was marked done.
+
+    Returns:
+        bool: True if the page was saved, False if the save was rejected.
+    """
     try:
 
         csv_name = st.session_state.selected_csv_file
-        df_group = st.session_state.concatenated_df[
-            st.session_state.concatenated_df["group"] == st.session_state.selected_set
-        ].iloc[:]
-        save_edited_csv(
-            df_group, f"{csv_name}/group_{st.session_state.selected_set}.csv"
-        )
+        selected_set = st.session_state.selected_set
+        df_group = current_group()["group_df"].iloc[group_positions(selected_set)]
 
-        # Display a success toast message
-        st.toast(":green[Edited CSV files saved successfully.]", icon="🎉")
+        if not save_edited_csv(df_group, csv_name, selected_set, done):
+            return False
 
         # Update session state variables
-        st.session_state.page_number += 1
+        current_group()["page_number"] += 1
         st.session_state.counter += 1
+        return True
 
     except Exception as e:
         print("An error occurred:", e)
+        return False
 
 
-def get_group_numbers_with_edit_status_true(csv_group_list):
+def save_selected_group():
     """
-    Get group numbers where the edit_status is True in the DataFrame.
+    Queue the edits of the selected group, without changing page.
+
+    Returns:
+        None
+    """
+    try:
+        selected_set = st.session_state.selected_set
+        df_group = current_group()["group_df"].iloc[group_positions(selected_set)]
+        save_edited_csv(df_group, st.session_state.selected_csv_file, selected_set)
+
+    except Exception as e:
+        print("An error occurred:", e)
+
+
+def get_group_row_counts(csv_name):
+    """
+    Get the number of rows of every group of a dataset, from the dataset manifest.
 
     Args:
-        data_frame (DataFrame): The DataFrame containing the data.
+        csv_name (str): The name of the dataset on Firebase Storage.
 
     Returns:
-        numpy.ndarray: An array of unique group numbers with edit_status set to True.
+        dict: Group number -> number of rows, empty if the manifest cannot be read.
+    """
+    try:
+        manifest = get_manifest(csv_name) or {"groups": {}}
+        return {
+            int(group_num): entry["rows"]
+            for group_num, entry in manifest["groups"].items()
+        }
+
+    except Exception as e:
+        print("An error occurred:", e)
+        return {}
+
+
+def get_group_numbers_with_edit_status_true(csv_name):
+    """
+    Get group numbers where the edit_status is True, from the dataset manifest.
+
+    Args:
+        csv_name (str): The name of the dataset on Firebase Storage.
+
+    Returns:
+        list: The group numbers with edit_status set to True, or None if the
+            dataset has no groups.
 
     Raises:
-        ValueError: If the DataFrame is empty or if the column edit_status is not found.
+        ValueError: If the manifest of the dataset cannot be read.
     """
     try:
-        num = []
-        # Filter the DataFrame to include only rows where edit_status is True
-        for file in csv_group_list:
-            csv_file = get_csv_file(st.session_state.selected_csv_file, file)
-            df = pd.read_csv(io.BytesIO(csv_file))
-
-            # Get the unique values from the group column
-            group_numbers_edit_true = df["edit_status"].unique()
-            if bool(group_numbers_edit_true[0]):
-                file = file.split(".csv")[0]
-                num.append(int(file.split("_")[-1]))
-        return num
+        manifest = get_manifest(csv_name)
+        if not manifest or not manifest["groups"]:
+            return None
+
+        return [
+            int(group_num)
+            for group_num, entry in manifest["groups"].items()
+            if entry["edit_status"]
+        ]
 
     except Exception as e:
         print("An error occurred:", e)
@@ -183,42 +532,597 @@ def handle_previous_page():
     """
     try:
         # Update session state variables
-        st.session_state.page_number -= 1
+        current_group()["page_number"] -= 1
         st.session_state.counter += 1
 
     except Exception as e:
         print("An error occurred:", e)
 
 
-def load_concat_data(csv_file):
+def load_selected_group(csv_name, selected_set):
     """
-    Load and concatenate data from train and val CSV files.
+    Load a group, the only part of the dataset the editor needs.
+
+    The group file is read through the shared blob cache, keyed by its generation,
+    with its edit journal replayed. Rows keep their position in the dataset as
+    index, and the loaded version becomes the base of the deltas saved by the
+    next pages.
 
     Args:
-        csv_file (str): The name of the CSV file containing train and val data.
+        csv_name (str): The name of the dataset on Firebase Storage.
+        selected_set (int): The group number.
 
     Returns:
-        DataFrame: Concatenated DataFrame containing train and val data.
-        int: Length of the train data.
+        dict: The group state (see ``group_state``), or None if the group could
+            not be loaded.
+    """
+    try:
+        group_df, _ = load_group(
+            csv_name,
+            selected_set,
+            dataset_state(csv_name)["format"],
+            columns=PAGE_COLUMNS,
+        )
+        if group_df is None:
+            st.error(f"Set {selected_set} could not be loaded.")
+            return None
+
+        # Position of the first row of the group in the dataset
+        offset = sum(
+            rows
+            for group_num, rows in dataset_state(csv_name)["group_sizes"].items()
+            if group_num < selected_set
+        )
+        # CSV files keep their own column order
+        group_df = group_df[[column for column in PAGE_COLUMNS if column in group_df]]
+        group_df.index = pd.RangeIndex(offset, offset + len(group_df))
+
+        state = {
+            "group_df": group_df,
+            "group_index": build_group_index(group_df),
+            "saved_group_df": group_df[EDITABLE_COLUMNS].reset_index(drop=True).copy(),
+            "page_number": 1,
+            "dirty_rows": set(),
+        }
+
+        # Edits of an earlier session that never reached storage
+        recovered = get_autosave_log().pending(csv_name, selected_set)
+        if recovered:
+            replay_journal(group_df, recovered)
+            state["dirty_rows"].update(entry["row"] for entry in recovered)
+            state["dirty_since"] = min(entry["ts"] for entry in recovered)
+            st.toast(f"Recovered {len(recovered)} unsaved edits of set {selected_set}.")
+        return state
 
-    Raises:
-        ValueError: If the CSV file name is invalid or if train or val data is not found.
-        IOError: If there are issues loading or concatenating the CSV data.
+    except Exception as e:
+        print("An error occurred:", e)
+        return None
+
+
+def audio_source(df, index):
+    """
+    Return the audio of a row of the selected group: its content when it was
+    prefetched (see ``prefetch_audio``), else its download link, or None if it has
+    none.
+    """
+    if "full_path" in df:
+        data = get_audio_cache().get(
+            audio_bucket_path(
+                st.session_state.selected_csv_file, df.loc[index, "full_path"]
+            )
+        )
+        if data is not None:
+            return data
+    link = df.loc[index, "audio_link"]
+    # Rows whose audio file was missing at upload get an empty player
+    return None if pd.isna(link) else link
+
+
+def next_unfinished_group(dataset, selected_set):
+    """Return the first group after ``selected_set`` that is not done, or None."""
+    candidates = [
+        group_num
+        for group_num in sorted(dataset["group_sizes"])
+        if group_num != selected_set and group_num not in (dataset["done_set"] or [])
+    ]
+    later = [group_num for group_num in candidates if group_num > selected_set]
+    return (later or candidates or [None])[0]
+
+
+def prefetch_audio(positions, first_rows):
+    """
+    Warm the audio cache with what the annotator is likely to play next.
+
+    The reads run in the background: the given rows of the selected group (e.g. the
+    next page) and the first rows of the next unfinished group. The rows shown on
+    the current page are left out, so a player never switches source while playing.
+
+    Args:
+        positions (array): Positions of the rows of the selected group to prefetch.
+        first_rows (int): The number of rows of the next unfinished group to prefetch.
+
+    Returns:
+        None
     """
     try:
-        # Get train data from CSV
-        train_csv = get_csv_file(csv_file, "train.csv")
-        train_data = pd.read_csv(io.BytesIO(train_csv))
+        csv_name = st.session_state.selected_csv_file
+        df = current_group()["group_df"]
+        if "full_path" not in df:
+            return
+
+        cache = get_audio_cache()
+        cache.prefetch(
+            [
+                audio_bucket_path(csv_name, path)
+                for path in df["full_path"].iloc[positions]
+            ]
+        )
 
-        # Get val data from CSV
-        val_csv = get_csv_file(csv_file, "val.csv")
-        val_data = pd.read_csv(io.BytesIO(val_csv))
+        # The next group is prefetched once per session
+        dataset = current_dataset()
+        next_set = next_unfinished_group(dataset, st.session_state.selected_set)
+        prefetched = dataset.setdefault("prefetched_groups", set())
+        if next_set is None or next_set in prefetched:
+            return
+        prefetched.add(next_set)
+        if next_set in dataset["groups"]:
+            next_df = dataset["groups"][next_set]["group_df"]
+            cache.prefetch(
+                [
+                    audio_bucket_path(csv_name, path)
+                    for path in next_df["full_path"].iloc[:first_rows]
+                ]
+            )
+        else:
+            prefetch_group_audio(csv_name, next_set, first_rows)
 
-        # Concatenate train and val data
-        concatenated_df = pd.concat([train_data, val_data], ignore_index=True)
+    except Exception as e:
+        print("An error occurred:", e)
 
-        # Return concatenated DataFrame and length of train data
-        return concatenated_df, len(train_data)
+
+def next_group_links(first_rows):
+    """
+    Return the audio links of the first rows of the next unfinished group.
+
+    The group is not loaded for this: its links are read from the group file once
+    per session, unless the group is already loaded.
+
+    Args:
+        first_rows (int): The number of rows of the next unfinished group.
+
+    Returns:
+        list: The download links, without the rows that have none.
+    """
+    try:
+        csv_name = st.session_state.selected_csv_file
+        dataset = current_dataset()
+        next_set = next_unfinished_group(dataset, st.session_state.selected_set)
+        if next_set is None:
+            return []
+
+        if next_set in dataset["groups"]:
+            links = dataset["groups"][next_set]["group_df"]["audio_link"]
+        else:
+            # Rows never move within a group, so the journal is not needed
+            next_links = dataset.setdefault("next_links", {})
+            if next_set not in next_links:
+                df, _ = read_dataset_file(
+                    csv_name,
+                    f"group_{next_set}",
+                    columns=["audio_link"],
+                    file_format=dataset["format"],
+                )
+                next_links[next_set] = [] if df is None else df["audio_link"]
+            links = next_links[next_set]
+        return [link for link in list(links)[:first_rows] if isinstance(link, str)]
+
+    except Exception as e:
+        print("An error occurred:", e)
+        return []
+
+
+def widget_key(index, selected_csv):
+    """Return the key of the text input of a row; the flag toggles add a suffix."""
+    return f"text-{st.session_state.selected_csv_file}-{index}-{selected_csv}"
+
+
+def render_utterance(index, selected_csv, batch=False, rerun=True):
+    """
+    Render the card of one row: audio player, the four flags and the text editor.
+
+    Args:
+        index (int): The index of the row in the session group DataFrame.
+        selected_csv (str): The edited text column.
+        batch (bool): The card is inside a page form. Changes are applied by
+            ``apply_page_edits`` when the form is submitted, instead of right away.
+        rerun (bool): Rerun the app after applying a change. Not needed when the
+            card is a fragment, which already reran by itself.
+
+    Returns:
+        None
+    """
+    df = current_group()["group_df"]
+    text_input_key = widget_key(index, selected_csv)
+
+    st.write(f":blue[Index : {index}]")
+    with st.container(border=True):
+        with st.container(border=True):
+            st.audio(audio_source(df, index), format="audio/wav")
+            audio_cols = st.columns(2)
+            for position, (column, suffix, label) in enumerate(FLAG_WIDGETS):
+                with audio_cols[position // 2]:
+                    value = st.toggle(
+                        label,
+                        key=f"{text_input_key}{suffix}",
+                        value=df.loc[index, column],
+                    )
+                    if not batch and value != df.loc[index, column]:
+                        df.loc[index, column] = value
+                        autosave_edits([(index, column, value)])
+                        if rerun:
+                            st.experimental_rerun()
+
+        st.text_input(
+            f"Default {selected_csv}",
+            value=df.loc[index, "raw_text"],
+            disabled=True,
+            autocomplete="off",
+        )
+
+        # Get the edited value from the user
+        edited_value = st.text_input(
+            f"Edit {selected_csv}",
+            value=df.loc[index, selected_csv],
+            key=text_input_key,
+            autocomplete="off",
+        )
+
+        # Check if the value has changed
+        if not batch and edited_value != df.loc[index, selected_csv]:
+            # Update the value in the DataFrame
+            df.loc[index, selected_csv] = edited_value
+            autosave_edits([(index, selected_csv, edited_value)])
+            st.toast(":green[Edited Successfully!]")
+            if rerun:
+                st.experimental_rerun()
+
+    st.divider()
+
+
+def render_utterance_fragment(index, selected_csv):
+    """
+    Render the card of one row as a fragment.
+
+    A change to one of its widgets only reruns this card, which updates its own row
+    of the session group DataFrame, instead of the whole app.
+    """
+    render_utterance(index, selected_csv, rerun=False)
+
+
+if FRAGMENT is not None:
+    render_utterance_fragment = FRAGMENT(render_utterance_fragment)
+
+
+def apply_page_edits(indices, selected_csv):
+    """
+    Apply the values of a submitted page form to the session group DataFrame.
+
+    All the widgets of the page are read from the session state and written with a
+    single vectorized update.
+
+    Args:
+        indices (list): The indices of the rows of the page.
+        selected_csv (str): The edited text column.
+
+    Returns:
+        None
+    """
+    try:
+        df = current_group()["group_df"]
+        widgets = [(selected_csv, "")] + [
+            (column, suffix) for column, suffix, _ in FLAG_WIDGETS
+        ]
+        current = df.loc[indices, [column for column, _ in widgets]]
+        edited = pd.DataFrame(
+            {
+                column: [
+                    st.session_state.get(
+                        f"{widget_key(index, selected_csv)}{suffix}",
+                        current.at[index, column],
+                    )
+                    for index in indices
+                ]
+                for column, suffix in widgets
+            },
+            index=indices,
+        )
+        df.loc[indices, edited.columns] = edited
+
+        # Only the cells that changed are logged
+        changed = edited.ne(current) & ~(edited.isna() & current.isna())
+        autosave_edits(
+            [
+                (index, column, edited.at[index, column])
+                for column in edited.columns
+                for index in edited.index[changed[column].to_numpy()]
+            ]
+        )
+
+    except Exception as e:
+        print("An error occurred:", e)
+
+
+def page_button(label, on_click, indices, selected_csv, batch, **kwargs):
+    """
+    Render a page navigation button.
+
+    In batch mode it submits the page form and applies its edits before ``on_click``.
+    """
+    if not batch:
+        return st.button(label, on_click=on_click, **kwargs)
+
+    def submit():
+        apply_page_edits(indices, selected_csv)
+        on_click()
+
+    return st.form_submit_button(label, on_click=submit, **kwargs)
+
+
+def grid_key(selected_csv):
+    """Return the key of the grid editor of the selected group."""
+    return f"grid-{st.session_state.selected_csv_file}-{st.session_state.selected_set}-{selected_csv}"
+
+
+def grid_columns(selected_csv):
+    """Return the columns shown by the grid editor, the first one read-only."""
+    return ["raw_text", selected_csv] + [column for column, _, _ in FLAG_WIDGETS]
+
+
+def reset_grids():
+    """
+    Drop the grid snapshots of the session groups when switching to or from the
+    grid view, so the grid of a group edited in the other views is rebuilt.
+
+    Returns:
+        None
+    """
+    for dataset in st.session_state.get("datasets", {}).values():
+        for group in dataset["groups"].values():
+            group.pop("grid_df", None)
+
+
+def apply_cell_edits(edits, columns):
+    """
+    Write a change set to the session group DataFrame in one vectorized update.
+
+    Only the cells listed are written, and the ones that changed are logged.
+
+    Args:
+        edits (dict): Row index -> {column: value}.
+        columns (list): The editable columns; edits of other columns are ignored.
+
+    Returns:
+        None
+    """
+    df = current_group()["group_df"]
+    indices = list(edits)
+    if not indices:
+        return
+
+    current = df.loc[indices, columns]
+    edited = current.copy()
+    touched = pd.DataFrame(False, index=current.index, columns=columns)
+    for position, values in enumerate(edits.values()):
+        for column, value in values.items():
+            if column in touched.columns:
+                column_position = columns.index(column)
+                edited.iat[position, column_position] = value
+                touched.iat[position, column_position] = True
+
+    updated = current.mask(touched, edited)
+    df.loc[indices, columns] = updated
+
+    changed = updated.ne(current) & ~(updated.isna() & current.isna())
+    autosave_edits(
+        [
+            (index, column, updated.at[index, column])
+            for column in columns
+            for index in updated.index[changed[column].to_numpy()]
+        ]
+    )
+
+
+def apply_grid_edits(selected_csv):
+    """
+    Apply the change set of the grid editor to the session group DataFrame.
+
+    The grid reports its edits as ``{position: {column: value}}`` against the
+    snapshot it was given; they are written by ``apply_cell_edits``.
+
+    Args:
+        selected_csv (str): The edited text column.
+
+    Returns:
+        None
+    """
+    try:
+        grid_df = current_group()["grid_df"]
+        edited_rows = st.session_state[grid_key(selected_csv)]["edited_rows"]
+        apply_cell_edits(
+            {
+                grid_df.index[int(position)]: values
+                for position, values in edited_rows.items()
+            },
+            grid_columns(selected_csv)[1:],
+        )
+
+    except Exception as e:
+        print("An error occurred:", e)
+
+
+def render_group_grid(selected_csv):
+    """
+    Render the whole selected group in a single grid editor, with the audio player
+    of the chosen row only.
+
+    The grid is one widget, instead of seven per row, and its change set is applied
+    by ``apply_grid_edits``. It is given a snapshot of the group, kept while the grid
+    view is on, so the grid is not rebuilt after every edit.
+
+    Args:
+        selected_csv (str): The edited text column.
+
+    Returns:
+        None
+    """
+    group = current_group()
+    df = group["group_df"]
+    if "grid_df" not in group:
+        positions = group_positions(st.session_state.selected_set)
+        group["grid_df"] = df.iloc[positions][grid_columns(selected_csv)].copy()
+    grid_df = group["grid_df"]
+
+    column_config = {
+        "raw_text": st.column_config.TextColumn(f"Default {selected_csv}"),
+        selected_csv: st.column_config.TextColumn(
+            f"Edit {selected_csv}", width="large"
+        ),
+    }
+    for column, _, label in FLAG_WIDGETS:
+        column_config[column] = st.column_config.CheckboxColumn(
+            label.removeprefix(":blue[").removesuffix("]")
+        )
+
+    st.data_editor(
+        grid_df,
+        key=grid_key(selected_csv),
+        column_config=column_config,
+        disabled=["raw_text"],
+        num_rows="fixed",
+        use_container_width=True,
+        on_change=apply_grid_edits,
+        args=(selected_csv,),
+    )
+
+    # Only the audio of the chosen row is loaded
+    index = st.selectbox(
+        ":blue[Listen to]",
+        list(grid_df.index),
+        format_func=lambda index: f"Index : {index}",
+        key=f"{grid_key(selected_csv)}-audio",
+    )
+    if index is not None:
+        st.audio(audio_source(df, index), format="audio/wav")
+
+    # The whole group is the page: any row may be played next
+    positions = group_positions(st.session_state.selected_set)
+    prefetch_audio(positions[df.index[positions] != index], ROWS_PER_PAGE)
+
+
+if FRAGMENT is not None:
+    # An edit only reruns the grid, not the whole app
+    render_group_grid = FRAGMENT(render_group_grid)
+
+
+def annotator_key(selected_csv):
+    """Return the key of the keyboard annotator of the selected group."""
+    return f"annotator-{st.session_state.selected_csv_file}-{st.session_state.selected_set}-{selected_csv}"
+
+
+def render_annotator(page_df, selected_csv, total_pages):
+    """
+    Render a page of the selected group in the keyboard annotator component.
+
+    Args:
+        page_df (DataFrame): The rows of the page.
+        selected_csv (str): The edited text column.
+        total_pages (int): The number of pages of the group.
+
+    Returns:
+        None
+    """
+    group = current_group()
+    flags = [column for column, _, _ in FLAG_WIDGETS]
+    rows = [
+        {
+            "index": int(index),
+            # NaN is not valid JSON; missing values are sent as None / ""
+            "audio": None if pd.isna(row["audio_link"]) else str(row["audio_link"]),
+            "raw_text": "" if pd.isna(row["raw_text"]) else str(row["raw_text"]),
+            "text": "" if pd.isna(row[selected_csv]) else str(row[selected_csv]),
+            "flags": {column: bool(row[column]) for column in flags},
+        }
+        for index, row in page_df.iterrows()
+    ]
+
+    # The browser preloads the audio of the next page and of the next unfinished set
+    positions = group_positions(st.session_state.selected_set)
+    page_end = group["page_number"] * ROWS_PER_PAGE
+    next_links = group["group_df"]["audio_link"].iloc[
+        positions[page_end : page_end + ROWS_PER_PAGE]
+    ]
+
+    actions = []
+    if group["page_number"] > 1:
+        actions.append("previous")
+    actions.append("next" if group["page_number"] <= total_pages else "done")
+
+    annotator(
+        rows,
+        [
+            (column, label.removeprefix(":blue[").removesuffix("]"))
+            for column, _, label in FLAG_WIDGETS
+        ],
+        token=f"{group['page_number']}-{st.session_state.counter}",
+        actions=actions,
+        text_column=selected_csv,
+        prefetch=[link for link in next_links if isinstance(link, str)]
+        + next_group_links(ROWS_PER_PAGE),
+        key=annotator_key(selected_csv),
+    )
+
+
+def handle_annotator_submit(selected_csv="text"):
+    """
+    Apply a diff sent by the keyboard annotator: its edits in one update, then its
+    page action. Autosave diffs only carry edits; they reach the group and the
+    autosave log while the page is still being edited.
+
+    The diff stays the value of the component, so it is applied only once, and only
+    if it comes from the page the annotator was rendered with.
+
+    Args:
+        selected_csv (str): The edited text column.
+
+    Returns:
+        None
+    """
+    try:
+        if st.session_state.get("view_mode") != "Keyboard":
+            return
+        if "selected_set" not in st.session_state:
+            return
+        payload = st.session_state.get(annotator_key(selected_csv))
+        group = current_group()
+        if not payload or group is None:
+            return
+        if payload["id"] == group.get("annotator_submit"):
+            return
+        group["annotator_submit"] = payload["id"]
+        if payload["token"] != f"{group['page_number']}-{st.session_state.counter}":
+            # Sent from a page that is no longer shown
+            return
+
+        apply_cell_edits(
+            {int(index): values for index, values in payload["edits"].items()},
+            [selected_csv] + [column for column, _, _ in FLAG_WIDGETS],
+        )
+        if payload["action"] == "next":
+            handle_next_page()
+        elif payload["action"] == "previous":
+            handle_previous_page()
+        elif payload["action"] == "done":
+            edit_status_done(st.session_state.selected_set)
 
     except Exception as e:
         print("An error occurred:", e)
@@ -226,9 +1130,14 @@ def load_concat_data(csv_file):
 
 def main():
 
+    # Before the selectboxes, which a done group resets
+    handle_annotator_submit()
+
     cols_head = st.columns([0.5, 0.3, 0.2], gap="small")
     with cols_head[0]:
         st.title(":blue[CSV TextEdit Hub]")
+    with cols_head[2]:
+        render_save_status()
     with cols_head[1]:
         st.image(
             "./assets/cat.png",
@@ -250,37 +1159,25 @@ def main():
             csv_list,
             index=None,
             placeholder="please select ...",
+            key="dataset_select",
             on_change=handle_selected_file,
         )
 
     with cols_file[1]:
         if selected_csv_file:
             st.session_state.selected_csv_file = selected_csv_file
+            dataset = dataset_state(selected_csv_file)
 
-            csv_group_list = name_csv_group_list(
-                f"csv_files/{st.session_state.selected_csv_file}"
-            )
-
-            if "concatenated_df" not in st.session_state:
-                st.session_state.concatenated_df, st.session_state.len_train_df = (
-                    load_concat_data(st.session_state.selected_csv_file)
-                )
-
-            highest_value = st.session_state.concatenated_df["group"].max()
-
-            if "done_set" not in st.session_state and csv_group_list:
-                st.session_state.done_set = get_group_numbers_with_edit_status_true(
-                    csv_group_list
-                )
+            highest_value = max(dataset["group_sizes"], default=0)
 
-            if "done_set" in st.session_state:
+            if dataset["done_set"] is not None:
 
                 set_group = list(range(1, highest_value + 1))
                 # Generate the list of options with labels indicating whether they are done or not
                 options = [
                     (
                         (num, f"{num} (done)")
-                        if num in st.session_state.done_set
+                        if num in dataset["done_set"]
                         else (num, num)
                     )
                     for num in set_group
@@ -292,11 +1189,14 @@ def main():
                     options,
                     index=None,
                     format_func=lambda x: x[1],
-                    on_change=handle_selected_file,
+                    key="group_select",
+                    on_change=handle_selected_group,
                 )
 
-                if selected_set and "selected_set" not in st.session_state:
+                if selected_set:
                     st.session_state.selected_set = selected_set[0]
+                else:
+                    st.session_state.pop("selected_set", None)
 
                 if "counter" not in st.session_state:
                     st.session_state.counter = 1
@@ -311,177 +1211,155 @@ def main():
                     height=0,
                 )
 
-    if "selected_set" in st.session_state and "done_set" in st.session_state:
-        if (
-            selected_csv_file
-            and st.session_state.selected_set not in st.session_state.done_set
-        ):
+    if (
+        selected_csv_file
+        and "selected_set" in st.session_state
+        and current_dataset()["done_set"] is not None
+        and current_group() is not None
+    ):
+        group = current_group()
+        if st.session_state.selected_set not in current_dataset()["done_set"]:
             selected_csv = "text"
+            view = st.session_state.get("view_mode", "Pages")
 
-            if "page_number" not in st.session_state:
-                st.session_state.page_number = 1
-
-            rows_per_page = 10
-            total_rows = len(
-                st.session_state.concatenated_df[
-                    st.session_state.concatenated_df["group"]
-                    == st.session_state.selected_set
-                ]
-            )
+            rows_per_page = ROWS_PER_PAGE
+            total_rows = len(group_positions(st.session_state.selected_set))
             total_pages = (
                 total_rows // rows_per_page + 1
                 if total_rows % rows_per_page != 0
                 else total_rows // rows_per_page
             )
-            selected_csv_data = load_data_for_page(
-                st.session_state.concatenated_df,
-                st.session_state.page_number - 1,
-                rows_per_page,
-                st.session_state.selected_set,
-            )
 
-            for index, row in selected_csv_data[[selected_csv]].iterrows():
-                st.write(f":blue[Index : {index}]")
-                with st.container(border=True):
-                    text_input_key = f"text-{index}-{selected_csv}"
+            if view == "Grid":
+                render_group_grid(selected_csv)
 
-                    with st.container(border=True):
-                        st.audio(
-                            st.session_state.concatenated_df.loc[index, "audio_link"],
-                            format="audio/wav",
-                        )
-                        audio_cols = st.columns(2)
-                        with audio_cols[0]:
-                            multi_speaker = st.toggle(
-                                ":blue[มีเสียงพูดหลายคน]",
-                                key=f"{text_input_key}_m",
-                                value=st.session_state.concatenated_df.loc[
-                                    index, "multi_speaker"
-                                ],
-                            )
-                            if (
-                                multi_speaker
-                                != st.session_state.concatenated_df.loc[
-                                    index, "multi_speaker"
-                                ]
-                            ):
-                                st.session_state.concatenated_df.loc[
-                                    index, "multi_speaker"
-                                ] = multi_speaker
-                                st.experimental_rerun()
-
-                            loud_noise = st.toggle(
-                                ":blue[มี noise ดัง]",
-                                key=f"{text_input_key}_l",
-                                value=st.session_state.concatenated_df.loc[
-                                    index, "loud_noise"
-                                ],
-                            )
-                            if (
-                                loud_noise
-                                != st.session_state.concatenated_df.loc[
-                                    index, "loud_noise"
-                                ]
-                            ):
-                                st.session_state.concatenated_df.loc[
-                                    index, "loud_noise"
-                                ] = loud_noise
-                                st.experimental_rerun()
-
-                        with audio_cols[1]:
-                            unclear = st.toggle(
-                                ":blue[ฟังไม่ออก/ไม่แน่ใจ]",
-                                key=f"{text_input_key}_u",
-                                value=st.session_state.concatenated_df.loc[
-                                    index, "unclear"
-                                ],
-                            )
-                            if (
-                                unclear
-                                != st.session_state.concatenated_df.loc[
-                                    index, "unclear"
-                                ]
-                            ):
-                                st.session_state.concatenated_df.loc[
-                                    index, "unclear"
-                                ] = unclear
-                                st.experimental_rerun()
-
-                            incomplete_sentence = st.toggle(
-                                ":blue[มีเสียงต้นท้ายประโยค / พูดไม่ครบประโยค]",
-                                key=f"{text_input_key}_i",
-                                value=st.session_state.concatenated_df.loc[
-                                    index, "incomplete_sentence"
-                                ],
-                            )
-                            if (
-                                incomplete_sentence
-                                != st.session_state.concatenated_df.loc[
-                                    index, "incomplete_sentence"
-                                ]
-                            ):
-                                st.session_state.concatenated_df.loc[
-                                    index, "incomplete_sentence"
-                                ] = incomplete_sentence
-                                st.experimental_rerun()
-
-                    st.text_input(
-                        f"Default {selected_csv}",
-                        value=st.session_state.concatenated_df.loc[index, "raw_text"],
-                        disabled=True,
-                        autocomplete="off",
+                st.warning(
+                    "Caution: Once you confirm the editing as done, no further modifications will be permitted."
+                )
+                cols = st.columns([0.4, 0.4, 0.2], gap="large")
+                with cols[0]:
+                    st.button(
+                        "Save",
+                        on_click=save_selected_group,
+                        type="primary",
                     )
-
-                    # Get the edited value from the user
-                    edited_value = st.text_input(
-                        f"Edit {selected_csv}",
-                        value=st.session_state.concatenated_df.loc[index, selected_csv],
-                        key=text_input_key,
-                        autocomplete="off",
+                with cols[2]:
+                    st.button(
+                        ":blue[Editing Done]",
+                        on_click=lambda: edit_status_done(
+                            st.session_state.selected_set
+                        ),
+                    )
+            elif view == "Keyboard":
+                selected_csv_data = load_data_for_page(
+                    group["group_df"],
+                    group["page_number"] - 1,
+                    rows_per_page,
+                    st.session_state.selected_set,
+                    group["group_index"],
+                )
+                if group["page_number"] > total_pages:
+                    st.warning(
+                        "Caution: Once you confirm the editing as done, no further modifications will be permitted."
+                    )
+                else:
+                    st.write(
+                        f":blue[Page {group['page_number']}] of :blue[{total_pages}]"
                     )
+                render_annotator(selected_csv_data, selected_csv, total_pages)
+            else:
+                selected_csv_data = load_data_for_page(
+                    group["group_df"],
+                    group["page_number"] - 1,
+                    rows_per_page,
+                    st.session_state.selected_set,
+                    group["group_index"],
+                )
+
+                # Off by default: only edits applied on change reach the autosave log
+                batch = st.session_state.get("batch_edit", False)
+                indices = list(selected_csv_data.index)
 
-                    # Check if the value has changed
-                    if (
-                        edited_value
-                        != st.session_state.concatenated_df.loc[index, selected_csv]
-                    ):
-                        # Update the value in the DataFrame
-                        st.session_state.concatenated_df.loc[index, selected_csv] = (
-                            edited_value
+                if batch:
+                    # Widgets inside a form do not rerun the script until it is submitted
+                    page_form = st.form(f"page-{group['page_number']}", border=False)
+                else:
+                    page_form = st.container()
+
+                with page_form:
+                    for index in indices:
+                        if batch or FRAGMENT is None:
+                            render_utterance(index, selected_csv, batch)
+                        else:
+                            render_utterance_fragment(index, selected_csv)
+
+                    if group["page_number"] > total_pages:
+                        st.warning(
+                            "Caution: Once you confirm the editing as done, no further modifications will be permitted."
                         )
-                        st.success("Edited Successfully!")
-                        time.sleep(1)
-                        st.experimental_rerun()
 
-                st.divider()
+                    cols = st.columns([0.4, 0.4, 0.2], gap="large")
+                    with cols[0]:
+                        if group["page_number"] > 1:
+                            page_button(
+                                "Previous",
+                                handle_previous_page,
+                                indices,
+                                selected_csv,
+                                batch,
+                                type="primary",
+                            )
 
-            if st.session_state.page_number > total_pages:
-                st.warning(
-                    "Caution: Once you confirm the editing as done, no further modifications will be permitted."
-                )
+                    with cols[1]:
+                        if group["page_number"] <= total_pages:
+                            st.write(
+                                f":blue[Page {group['page_number']}] of :blue[{total_pages}]"
+                            )
 
-            cols = st.columns([0.4, 0.4, 0.2], gap="large")
-            with cols[0]:
-                if st.session_state.page_number > 1:
-                    st.button("Previous", type="primary", on_click=handle_previous_page)
+                    with cols[2]:
+                        if group["page_number"] <= total_pages:
+                            page_button(
+                                "Next Page",
+                                handle_next_page,
+                                indices,
+                                selected_csv,
+                                batch,
+                                type="primary",
+                            )
 
-            with cols[1]:
-                if st.session_state.page_number <= total_pages:
-                    st.write(
-                        f":blue[Page {st.session_state.page_number}] of :blue[{total_pages}]"
-                    )
+                        else:
+                            page_button(
+                                ":blue[Editing Done]",
+                                lambda: edit_status_done(st.session_state.selected_set),
+                                indices,
+                                selected_csv,
+                                batch,
+                            )
 
-            with cols[2]:
-                if st.session_state.page_number <= total_pages:
-                    st.button("Next Page", type="primary", on_click=handle_next_page)
+                # Audio of the next page
+                positions = group_positions(st.session_state.selected_set)
+                page_end = group["page_number"] * rows_per_page
+                prefetch_audio(
+                    positions[page_end : page_end + rows_per_page], rows_per_page
+                )
 
-                else:
-                    st.button(
-                        label=":blue[Editing Done]",
-                        on_click=lambda: edit_status_done(
-                            st.session_state.selected_set
-                        ),
-                    )
+            st.radio(
+                "View",
+                ["Pages", "Grid", "Keyboard"],
+                key="view_mode",
+                horizontal=True,
+                on_change=reset_grids,
+                help="Pages: one card per row. Grid: the whole set in one table. "
+                "Keyboard: a page edited in the browser with hotkeys, autosaved "
+                "as you go.",
+            )
+            st.toggle(
+                "Batch edit",
+                value=False,
+                key="batch_edit",
+                help="Apply the edits of a page when leaving it, instead of on every "
+                "change. Edits in progress are not autosaved until then.",
+            )
         else:
             st.warning(
                 f"The edits for set {st.session_state.selected_set} have already been completed."
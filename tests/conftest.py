@@ -0,0 +1,59 @@
+import os
+
+import pandas as pd
+import pytest
+
+import database.audio_cache
+import database.autosave
+import database.cache
+import database.catalog
+import database.storage
+from database.autosave import AutosaveLog
+from database.cache import BlobCache
+from database.storage import MemoryStorage
+
+
+@pytest.fixture(autouse=True)
+def storage(tmp_path, monkeypatch):
+    """Run every test against a fresh in-memory bucket and fresh shared caches."""
+    backend = MemoryStorage()
+    monkeypatch.setattr(database.storage, "_storage", backend)
+    monkeypatch.setattr(
+        database.cache, "_blob_cache", BlobCache(cache_dir=str(tmp_path / "blobs"))
+    )
+    monkeypatch.setattr(database.catalog, "_catalog", None)
+    monkeypatch.setattr(database.audio_cache, "_audio_cache", None)
+    monkeypatch.setattr(
+        database.autosave,
+        "_autosave_log",
+        AutosaveLog(str(tmp_path / "autosave.sqlite3")),
+    )
+    return backend
+
+
+@pytest.fixture
+def make_dataset(tmp_path):
+    """
+    Build a local dataset folder as expected by ``upload_csv_files``.
+
+    The returned function writes ``train.csv`` and ``val.csv`` (``full_path`` and
+    ``text`` columns) and one .wav file per row in the audio sub-folder, and
+    returns the folder path.
+    """
+
+    def make(name="ds", n_train=120, n_val=37):
+        folder = tmp_path / name
+        audio = folder / name
+        audio.mkdir(parents=True)
+        rows = []
+        for i in range(n_train + n_val):
+            file_name = f"utt_{i}.wav"
+            (audio / file_name).write_bytes(os.urandom(200))
+            rows.append(
+                {"full_path": f"/data/wavs/{file_name}", "text": f"sentence {i}"}
+            )
+        pd.DataFrame(rows[:n_train]).to_csv(folder / "train.csv", index=False)
+        pd.DataFrame(rows[n_train:]).to_csv(folder / "val.csv", index=False)
+        return str(folder)
+
+    return make
@@ -0,0 +1,123 @@
+import json
+import os
+import time
+
+import pytest
+from streamlit.testing.v1 import AppTest
+from streamlit.proto.WidgetStates_pb2 import WidgetState
+from streamlit.testing.v1 import element_tree
+from streamlit.testing.v1.element_tree import Selectbox
+
+from database import get_autosave_log, upload_csv_files
+from database.journal import read_journal
+
+MAIN = os.path.join(os.path.dirname(os.path.dirname(__file__)), "main.py")
+
+
+def format_option(option):
+    # The labels main.py gives to the set and row selectbox options
+    if isinstance(option, (tuple, list)):
+        return str(option[1])
+    return str(option)
+
+
+@pytest.fixture
+def app(make_dataset, monkeypatch):
+    upload_csv_files(make_dataset("ds"), 50)
+    upload_csv_files(make_dataset("ds2", n_train=30, n_val=10), 10)
+    for name in ["ds3", "ds4"]:
+        upload_csv_files(make_dataset(name, n_train=8, n_val=2), 10)
+    upload_csv_files(make_dataset("many", n_train=80, n_val=20), 10)
+    # AppTest formats options with str, not with the format_func of the app
+    monkeypatch.setattr(Selectbox, "format_func", property(lambda self: format_option))
+    monkeypatch.chdir(os.path.dirname(MAIN))
+    at = AppTest.from_file(MAIN, default_timeout=30)
+    at.run()
+    return at
+
+
+def open_group(at, dataset, group_num):
+    at.selectbox[0].select(dataset).run()
+    at.selectbox[1].set_value((group_num, group_num)).run()
+
+
+def edit_first_row(at, dataset, group_num, text="typed"):
+    # Batch edit is off by default: each change is applied and autosaved
+    open_group(at, dataset, group_num)
+    at.text_input[1].set_value(text).run()
+
+
+def test_autosaved_groups_of_several_datasets_are_flushed(app):
+    edit_first_row(app, "ds", 1)
+    # A second dataset in the session LRU
+    open_group(app, "ds2", 1)
+    group = app.session_state.datasets["ds"]["groups"][1]
+    group["dirty_since"] = time.time() - 60
+
+    app.run()
+
+    assert not app.exception
+    assert list(app.session_state.datasets) == ["ds", "ds2"]
+    assert "dirty_since" not in group
+    assert app.session_state.save_queue.flush(10)
+    assert [(e["row"], e["column"], e["value"]) for e in read_journal("ds", 1)] == [
+        (0, "text", "typed")
+    ]
+
+
+def test_evicted_dataset_with_unsaved_edits_is_saved(app):
+    edit_first_row(app, "ds", 1)
+    assert app.session_state.datasets["ds"]["groups"][1].get("dirty_since")
+
+    # Three datasets are kept per session
+    for dataset in ["ds2", "ds3", "ds4"]:
+        open_group(app, dataset, 1)
+
+    assert not app.exception
+    assert "ds" not in app.session_state.datasets
+    assert app.session_state.save_queue.flush(10)
+    assert [(e["row"], e["column"], e["value"]) for e in read_journal("ds", 1)] == [
+        (0, "text", "typed")
+    ]
+
+
+def test_evicted_group_with_unsaved_edits_is_saved(app):
+    edit_first_row(app, "many", 1)
+
+    # Eight groups are kept per dataset
+    for group_num in range(2, 10):
+        app.selectbox[1].set_value((group_num, group_num)).run()
+
+    assert not app.exception
+    assert 1 not in app.session_state.datasets["many"]["groups"]
+    assert app.session_state.save_queue.flush(10)
+    assert [e["value"] for e in read_journal("many", 1)] == ["typed"]
+
+
+def test_keyboard_autosave_diff_is_applied_without_a_page_action(app, monkeypatch):
+    open_group(app, "ds", 2)
+    app.radio(key="view_mode").set_value("Keyboard").run()
+    [annotator] = [e for e in app.main if e.type == "component_instance"]
+    args = json.loads(annotator.proto.json_args)
+    index = args["rows"][0]["index"]
+    diff = {"id": "1", "token": args["token"], "action": "autosave"}
+    diff["edits"] = {str(index): {"text": "typed"}}
+    get_widget_state = element_tree.get_widget_state
+
+    def send_diff(node):
+        # The value the annotator sets with setComponentValue
+        if node.type != "component_instance":
+            return get_widget_state(node)
+        state = WidgetState(id=node.proto.id)
+        state.json_value = json.dumps(diff)
+        return state
+
+    monkeypatch.setattr(element_tree, "get_widget_state", send_diff)
+    app.run()
+
+    assert not app.exception
+    group = app.session_state.datasets["ds"]["groups"][2]
+    assert group["group_df"].loc[index, "text"] == "typed"
+    assert group["page_number"] == 1
+    assert group.get("dirty_since")
+    assert [e["value"] for e in get_autosave_log().pending("ds", 2)] == ["typed"]
@@ -0,0 +1,66 @@
+import time
+
+import numpy as np
+import pandas as pd
+
+from database import AutosaveLog, replay_journal
+
+
+def test_later_edit_of_a_cell_replaces_the_earlier_one(tmp_path):
+    log = AutosaveLog(str(tmp_path / "autosave.sqlite3"))
+
+    log.record("ds", 1, [{"row": 0, "column": "text", "value": "first"}])
+    log.record(
+        "ds",
+        1,
+        [
+            {"row": 0, "column": "text", "value": "second"},
+            {"row": 2, "column": "unclear", "value": np.bool_(True)},
+            {"row": 3, "column": "text", "value": np.nan},
+        ],
+    )
+
+    entries = log.pending("ds", 1)
+    assert [(e["row"], e["column"], e["value"]) for e in entries] == [
+        (0, "text", "second"),
+        (2, "unclear", True),
+        (3, "text", None),
+    ]
+
+
+def test_pending_edits_are_kept_per_group(tmp_path):
+    log = AutosaveLog(str(tmp_path / "autosave.sqlite3"))
+
+    log.record("ds", 1, [{"row": 0, "column": "text", "value": "ds 1"}])
+    log.record("ds", 2, [{"row": 0, "column": "text", "value": "ds 2"}])
+    log.record("other", 1, [{"row": 0, "column": "text", "value": "other 1"}])
+
+    assert [e["value"] for e in log.pending("ds", 2)] == ["ds 2"]
+    assert log.pending("ds", 3) == []
+
+
+def test_edits_survive_a_restart(tmp_path):
+    path = str(tmp_path / "autosave.sqlite3")
+    AutosaveLog(path).record("ds", 1, [{"row": 4, "column": "text", "value": "kept"}])
+
+    entries = AutosaveLog(path).pending("ds", 1)
+
+    df = pd.DataFrame({"text": [f"sentence {i}" for i in range(5)]})
+    replay_journal(df, entries)
+    assert df.loc[4, "text"] == "kept"
+
+
+def test_clear_keeps_the_edits_made_while_saving(tmp_path):
+    log = AutosaveLog(str(tmp_path / "autosave.sqlite3"))
+    log.record("ds", 1, [{"row": 0, "column": "text", "value": "saved"}])
+    saved_at = log.pending("ds", 1)[0]["ts"]
+    time.sleep(0.01)
+    log.record("ds", 1, [{"row": 1, "column": "text", "value": "newer"}])
+    log.record("ds", 2, [{"row": 0, "column": "text", "value": "other group"}])
+
+    log.clear("ds", 1, up_to=saved_at)
+
+    assert [e["value"] for e in log.pending("ds", 1)] == ["newer"]
+    log.clear("ds", 1)
+    assert log.pending("ds", 1) == []
+    assert len(log.pending("ds", 2)) == 1
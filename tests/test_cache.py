@@ -0,0 +1,111 @@
+from database.cache import BlobCache
+from database.storage import MemoryStorage
+
+
+class CountingStorage(MemoryStorage):
+    """MemoryStorage counting the content downloads."""
+
+    def __init__(self):
+        super().__init__()
+        self.reads = 0
+
+    def read(self, path):
+        self.reads += 1
+        return super().read(path)
+
+
+def test_unchanged_blob_is_downloaded_once(tmp_path):
+    storage = CountingStorage()
+    storage.write("csv_files/ds/group_1.csv", b"v1")
+    cache = BlobCache(cache_dir=str(tmp_path))
+
+    assert cache.get("csv_files/ds/group_1.csv", storage) == b"v1"
+    assert cache.get("csv_files/ds/group_1.csv", storage) == b"v1"
+    assert storage.reads == 1
+    assert cache.stats()["misses"] == 1
+    assert cache.stats()["hits"] == 1
+
+
+def test_new_generation_is_downloaded_again(tmp_path):
+    storage = CountingStorage()
+    storage.write("csv_files/ds/group_1.csv", b"v1")
+    cache = BlobCache(cache_dir=str(tmp_path))
+    cache.get("csv_files/ds/group_1.csv", storage)
+
+    info = storage.write("csv_files/ds/group_1.csv", b"v2")
+
+    assert cache.get_with_generation("csv_files/ds/group_1.csv", storage) == (
+        b"v2",
+        info.generation,
+    )
+    assert storage.reads == 2
+
+
+def test_deleted_blob_is_not_served(tmp_path):
+    storage = CountingStorage()
+    storage.write("csv_files/ds/group_1.csv", b"v1")
+    cache = BlobCache(cache_dir=str(tmp_path))
+    cache.get("csv_files/ds/group_1.csv", storage)
+
+    storage.delete("csv_files/ds/group_1.csv")
+
+    assert cache.get_with_generation("csv_files/ds/group_1.csv", storage) == (
+        None,
+        None,
+    )
+    assert cache.stats()["not_found"] == 1
+
+
+def test_put_warms_the_cache(tmp_path):
+    storage = CountingStorage()
+    info = storage.write("csv_files/ds/group_1.csv", b"v1")
+    cache = BlobCache(cache_dir=str(tmp_path))
+
+    cache.put("csv_files/ds/group_1.csv", b"v1", info.generation, storage)
+
+    assert cache.get("csv_files/ds/group_1.csv", storage) == b"v1"
+    assert storage.reads == 0
+
+
+def test_disk_cache_is_shared_between_caches(tmp_path):
+    storage = CountingStorage()
+    storage.write("csv_files/ds/group_1.csv", b"v1")
+    BlobCache(cache_dir=str(tmp_path)).get("csv_files/ds/group_1.csv", storage)
+
+    # Another process: empty memory, same cache directory
+    other = BlobCache(cache_dir=str(tmp_path))
+
+    assert other.get("csv_files/ds/group_1.csv", storage) == b"v1"
+    assert other.stats()["disk_hits"] == 1
+    assert storage.reads == 1
+
+
+def test_memory_budget_evicts_least_recently_used(tmp_path):
+    storage = MemoryStorage()
+    for name in ["a", "b", "c"]:
+        storage.write(f"csv_files/ds/{name}.csv", b"x" * 10)
+    cache = BlobCache(max_bytes=25, cache_dir="")
+
+    cache.get("csv_files/ds/a.csv", storage)
+    cache.get("csv_files/ds/b.csv", storage)
+    cache.get("csv_files/ds/a.csv", storage)
+    cache.get("csv_files/ds/c.csv", storage)
+
+    stats = cache.stats()
+    assert stats["evictions"] == 1
+    assert stats["bytes"] == 20
+    # b was the least recently used
+    cache.get("csv_files/ds/a.csv", storage)
+    assert cache.stats()["hits"] == 2
+
+
+def test_entries_are_keyed_by_backend(tmp_path):
+    first = MemoryStorage()
+    second = MemoryStorage()
+    first.write("csv_files/ds/group_1.csv", b"first")
+    second.write("csv_files/ds/group_1.csv", b"second")
+    cache = BlobCache(cache_dir=str(tmp_path))
+
+    # Both blobs have generation 1
+    assert cache.get("csv_files/ds/group_1.csv", first) == b"first"
+    assert cache.get("csv_files/ds/group_1.csv", second) == b"second"
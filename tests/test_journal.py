@@ -0,0 +1,134 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import database.journal
+from database import (
+    compact_group,
+    get_manifest,
+    load_group,
+    read_dataset_file,
+    save_group_edits,
+    upload_csv_files,
+)
+from database.journal import (
+    append_journal,
+    diff_group,
+    list_journal,
+    plain_value,
+    read_journal,
+    replay_journal,
+)
+
+
+@pytest.fixture
+def dataset(make_dataset):
+    upload_csv_files(make_dataset(), 50)
+    return "ds"
+
+
+def test_diff_group_only_returns_changed_cells():
+    base = pd.DataFrame(
+        {"text": ["a", "b", np.nan], "unclear": [False, False, False]},
+    )
+    edited = base.copy()
+    edited.loc[1, "text"] = "B"
+    edited.loc[2, "unclear"] = True
+
+    entries = diff_group(base, edited)
+
+    assert [(e["row"], e["column"], e["value"]) for e in entries] == [
+        (1, "text", "B"),
+        (2, "unclear", True),
+    ]
+
+
+def test_plain_value():
+    assert plain_value(np.bool_(True)) is True
+    assert plain_value(np.int64(3)) == 3
+    assert plain_value(np.nan) is None
+    assert plain_value("text") == "text"
+
+
+def test_replay_journal_later_entries_win():
+    df = pd.DataFrame({"text": ["a", "b"], "unclear": [False, False]})
+
+    replay_journal(
+        df,
+        [
+            {"row": 0, "column": "text", "value": "first"},
+            {"row": 0, "column": "text", "value": "second"},
+            {"row": 1, "column": "unclear", "value": True},
+            {"row": 1, "column": "text", "value": None},
+            # Out of range rows and unknown columns are ignored
+            {"row": 5, "column": "text", "value": "x"},
+            {"row": 0, "column": "missing", "value": "x"},
+        ],
+    )
+
+    assert df.loc[0, "text"] == "second"
+    assert pd.isna(df.loc[1, "text"])
+    assert bool(df.loc[1, "unclear"])
+    assert list(df.columns) == ["text", "unclear"]
+
+
+def test_journal_segments_are_read_in_order(dataset):
+    append_journal(dataset, 1, [{"row": 0, "column": "text", "value": "one"}])
+    append_journal(dataset, 1, [{"row": 0, "column": "text", "value": "two"}])
+    assert append_journal(dataset, 1, []) is None
+
+    assert len(list_journal(dataset, 1)) == 2
+    assert [e["value"] for e in read_journal(dataset, 1)] == ["one", "two"]
+
+
+def test_saved_edits_are_replayed_on_load(dataset):
+    base, generation = load_group(dataset, 1)
+    edited = base.copy()
+    edited.loc[3, "text"] = "edited"
+    edited.loc[4, "loud_noise"] = True
+
+    assert save_group_edits(dataset, 1, base, edited) == 2
+
+    group, _ = load_group(dataset, 1)
+    assert group.loc[3, "text"] == "edited"
+    assert bool(group.loc[4, "loud_noise"])
+    # Only the journal was written, the group file is untouched
+    assert read_dataset_file(dataset, "group_1")[1] == generation
+    assert get_manifest(dataset)["groups"]["1"]["flags"]["loud_noise"] == 1
+
+
+def test_unchanged_group_writes_nothing(dataset):
+    base, _ = load_group(dataset, 1)
+
+    assert save_group_edits(dataset, 1, base, base.copy()) == 0
+    assert list_journal(dataset, 1) == []
+
+
+def test_compaction_folds_the_journal_into_the_group_file(dataset):
+    base, generation = load_group(dataset, 1)
+    edited = base.copy()
+    edited.loc[0, "text"] = "compacted"
+    save_group_edits(dataset, 1, base, edited)
+
+    new_generation = compact_group(dataset, 1)
+
+    assert new_generation != generation
+    assert list_journal(dataset, 1) == []
+    df, _ = read_dataset_file(dataset, "group_1")
+    assert df.loc[0, "text"] == "compacted"
+    assert get_manifest(dataset)["groups"]["1"]["generation"] == new_generation
+    assert compact_group(dataset, 1) is None
+
+
+def test_long_journal_is_compacted_on_save(dataset, monkeypatch):
+    monkeypatch.setattr(database.journal, "JOURNAL_COMPACT_SEGMENTS", 3)
+    group, _ = load_group(dataset, 1)
+    for i in range(3):
+        edited = group.copy()
+        edited.loc[i, "text"] = f"edit {i}"
+        save_group_edits(dataset, 1, group, edited)
+        group = edited
+
+    assert list_journal(dataset, 1) == []
+    df, _ = read_dataset_file(dataset, "group_1")
+    assert list(df["text"].iloc[:3]) == ["edit 0", "edit 1", "edit 2"]
@@ -0,0 +1,131 @@
+import pytest
+
+from database import (
+    editing_done,
+    get_manifest,
+    load_group,
+    save_group,
+    upload_csv_files,
+)
+from database.manifest import (
+    empty_manifest,
+    manifest_path,
+    read_manifest,
+    update_manifest,
+    write_manifest,
+)
+from database.storage import ConflictError
+
+
+def test_write_is_conditional_on_the_generation():
+    generation = write_manifest("ds", empty_manifest(), if_generation_match=0)
+
+    with pytest.raises(ConflictError):
+        write_manifest("ds", empty_manifest(), if_generation_match=0)
+
+    manifest, read_generation = read_manifest("ds")
+    assert read_generation == generation
+    manifest["format"] = "csv"
+    write_manifest("ds", manifest, if_generation_match=generation)
+    with pytest.raises(ConflictError):
+        write_manifest("ds", manifest, if_generation_match=generation)
+
+
+def test_missing_manifest():
+    assert read_manifest("ds") == (None, None)
+
+
+def test_update_retries_on_a_concurrent_update():
+    write_manifest("ds", empty_manifest())
+    calls = []
+
+    def update(manifest):
+        calls.append(dict(manifest["groups"]))
+        if len(calls) == 1:
+            # Another session updates the manifest between our read and write
+            other, _ = read_manifest("ds")
+            other["groups"]["2"] = {"rows": 2}
+            write_manifest("ds", other)
+        manifest["groups"]["1"] = {"rows": 1}
+
+    update_manifest("ds", update)
+
+    assert len(calls) == 2
+    manifest, _ = read_manifest("ds")
+    assert manifest["groups"] == {"1": {"rows": 1}, "2": {"rows": 2}}
+
+
+def test_update_gives_up_when_the_manifest_keeps_changing():
+    write_manifest("ds", empty_manifest())
+
+    def update(manifest):
+        write_manifest("ds", read_manifest("ds")[0])
+
+    with pytest.raises(ConflictError):
+        update_manifest("ds", update, retries=3)
+
+
+def test_update_creates_a_missing_manifest():
+    update_manifest("ds", lambda manifest: manifest.update(format="csv"))
+
+    assert read_manifest("ds")[0]["format"] == "csv"
+
+
+def test_editing_done_updates_the_group_entry(make_dataset):
+    upload_csv_files(make_dataset(), 50)
+    assert not get_manifest("ds")["groups"]["2"]["edit_status"]
+
+    editing_done("ds", 2)
+
+    groups = get_manifest("ds")["groups"]
+    assert groups["2"]["edit_status"]
+    assert not groups["1"]["edit_status"]
+
+
+def test_legacy_dataset_gets_a_manifest_built(make_dataset, storage):
+    upload_csv_files(make_dataset(), 50)
+    built = get_manifest("ds")
+    storage.delete(manifest_path("ds"))
+
+    manifest = get_manifest("ds")
+
+    assert manifest["format"] == "csv"
+    assert {
+        group_num: entry["rows"] for group_num, entry in manifest["groups"].items()
+    } == {group_num: entry["rows"] for group_num, entry in built["groups"].items()}
+    assert storage.exists(manifest_path("ds"))
+
+
+@pytest.mark.parametrize("chunk_size", [None, 40])
+def test_sync_keeps_the_entries_of_journaled_groups(make_dataset, chunk_size):
+    folder = make_dataset()
+    upload_csv_files(folder, 50)
+    # Marked done from the editor: the done status only lives in the journal
+    base, _ = load_group("ds", 2)
+    done = base.copy()
+    done["edit_status"] = True
+    done.loc[0, "unclear"] = True
+    save_group("ds", 2, base, done, done=True)
+
+    upload_csv_files(folder, 50, sync=True, chunk_size=chunk_size)
+
+    group, _ = load_group("ds", 2)
+    assert group["edit_status"].all()
+    entry = get_manifest("ds")["groups"]["2"]
+    assert entry["edit_status"]
+    assert entry["flags"]["unclear"] == 1
+    assert not get_manifest("ds")["groups"]["1"]["edit_status"]
+
+
+def test_kept_group_without_an_entry_is_rebuilt_from_its_journal(make_dataset, storage):
+    folder = make_dataset()
+    upload_csv_files(folder, 50)
+    base, _ = load_group("ds", 3)
+    done = base.copy()
+    done["edit_status"] = True
+    save_group("ds", 3, base, done, done=True)
+    storage.delete(manifest_path("ds"))
+
+    upload_csv_files(folder, 50, sync=True)
+
+    assert get_manifest("ds")["groups"]["3"]["edit_status"]
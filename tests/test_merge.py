@@ -0,0 +1,142 @@
+import os
+
+import pandas as pd
+import pytest
+
+from database import (
+    concat_csv_files_for_downloading,
+    editing_done,
+    get_manifest,
+    get_split_layout,
+    load_group,
+    save_group_edits,
+    upload_audio_files,
+    upload_csv_files,
+)
+from database.storage import get_storage
+
+
+def add_rows(folder, split, start, count):
+    # Append new utterances, with their audio files, to a source split
+    rows = []
+    for i in range(start, start + count):
+        file_name = f"utt_{i}.wav"
+        with open(os.path.join(folder, "ds", file_name), "wb") as f:
+            f.write(os.urandom(200))
+        rows.append({"full_path": f"/data/wavs/{file_name}", "text": f"new {i}"})
+    path = os.path.join(folder, f"{split}.csv")
+    df = pd.concat([pd.read_csv(path), pd.DataFrame(rows)], ignore_index=True)
+    df.to_csv(path, index=False)
+    return df
+
+
+@pytest.fixture(params=["csv", "parquet"])
+def annotated(request, make_dataset):
+    """An uploaded dataset with an edited group (1) and a done group (4)."""
+    folder = make_dataset()
+    upload_audio_files(f"{folder}/ds")
+    upload_csv_files(folder, 50, file_format=request.param)
+
+    base, _ = load_group("ds", 1)
+    edited = base.copy()
+    edited.loc[3, "text"] = "edited"
+    save_group_edits("ds", 1, base, edited)
+    editing_done("ds", 4)
+    return folder
+
+
+def change_source(folder):
+    # Changed texts in groups 1 and 2, 12 new train rows and 5 new val rows
+    train = pd.read_csv(os.path.join(folder, "train.csv"))
+    train.loc[0, "text"] = "changed in group 1"
+    train.loc[60, "text"] = "changed in group 2"
+    train.to_csv(os.path.join(folder, "train.csv"), index=False)
+    train = add_rows(folder, "train", 1000, 12)
+    val = add_rows(folder, "val", 2000, 5)
+    upload_audio_files(f"{folder}/ds", sync=True)
+    return train, val
+
+
+def test_merge_keeps_edited_groups_and_appends_new_rows(annotated):
+    generations = {
+        group_num: entry["generation"]
+        for group_num, entry in get_manifest("ds")["groups"].items()
+    }
+    change_source(annotated)
+
+    upload_csv_files(annotated, 50, merge=True)
+
+    manifest = get_manifest("ds")
+    assert manifest["splits"] == {"train": 132, "val": 42}
+    assert get_split_layout("ds") == [
+        ["train", 120],
+        ["val", 37],
+        ["train", 12],
+        ["val", 5],
+    ]
+    groups = manifest["groups"]
+    assert {group_num: entry["rows"] for group_num, entry in groups.items()} == {
+        "1": 50,
+        "2": 50,
+        "3": 50,
+        "4": 7,
+        "5": 17,
+    }
+    # Edited and done groups, and unchanged ones, are kept as they are
+    for group_num in ["1", "3", "4"]:
+        assert groups[group_num]["generation"] == generations[group_num]
+    assert groups["4"]["edit_status"]
+
+    group_1, _ = load_group("ds", 1)
+    assert group_1.loc[0, "text"] == "sentence 0"
+    assert group_1.loc[3, "text"] == "edited"
+    # Groups nobody touched are refreshed from the source
+    group_2, _ = load_group("ds", 2)
+    assert group_2.loc[10, "text"] == "changed in group 2"
+    group_5, _ = load_group("ds", 5)
+    assert len(group_5) == 17
+    assert group_5["audio_link"].notna().all()
+    assert group_5["full_path"].iloc[-1] == "/data/wavs/utt_2004.wav"
+
+
+def test_merge_dry_run_changes_nothing(annotated):
+    change_source(annotated)
+    before = {
+        blob.name: blob.generation
+        for blob in get_storage().list_blobs(prefix="csv_files/ds/")
+    }
+
+    upload_csv_files(annotated, 50, merge=True, dry_run=True)
+
+    after = {
+        blob.name: blob.generation
+        for blob in get_storage().list_blobs(prefix="csv_files/ds/")
+    }
+    assert after == before
+
+
+def test_merge_of_an_unchanged_source_is_a_no_op(annotated):
+    change_source(annotated)
+    upload_csv_files(annotated, 50, merge=True)
+    manifest = get_manifest("ds")
+
+    upload_csv_files(annotated, 50, merge=True)
+
+    assert get_manifest("ds")["groups"].keys() == manifest["groups"].keys()
+    for group_num, entry in manifest["groups"].items():
+        assert get_manifest("ds")["groups"][group_num]["generation"] == (
+            entry["generation"]
+        )
+
+
+def test_export_after_merge_keeps_the_splits(annotated, tmp_path):
+    train, val = change_source(annotated)
+    upload_csv_files(annotated, 50, merge=True)
+
+    concat_csv_files_for_downloading("ds", str(tmp_path))
+
+    exported_train = pd.read_csv(tmp_path / "ds_train.csv")
+    exported_val = pd.read_csv(tmp_path / "ds_val.csv")
+    assert set(exported_train["full_path"]) == set(train["full_path"])
+    assert set(exported_val["full_path"]) == set(val["full_path"])
+    assert (exported_train["text"] == "edited").sum() == 1
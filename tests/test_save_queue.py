@@ -0,0 +1,135 @@
+import threading
+
+import pandas as pd
+
+from database import SaveQueue
+
+
+class Recorder:
+    """A save function recording its calls, failing while ``failing`` is set."""
+
+    def __init__(self, failing=False):
+        self.calls = []
+        self.failing = failing
+        self.started = threading.Event()
+        self.called = threading.Event()
+        self.release = threading.Event()
+        self.release.set()
+
+    def __call__(self, dataset, group_num, base_df, edited_df, done):
+        self.started.set()
+        self.release.wait(5)
+        self.calls.append((dataset, group_num, base_df, edited_df, done))
+        self.called.set()
+        if self.failing:
+            raise IOError("storage unavailable")
+
+
+def frame(value):
+    return pd.DataFrame({"text": [value]})
+
+
+def test_saves_run_in_the_background():
+    save = Recorder()
+    saved = []
+    queue = SaveQueue(save, on_saved=lambda *args: saved.append(args[:2]))
+
+    queue.enqueue("ds", 1, frame("a"), frame("b"), done=True)
+
+    assert queue.flush(5)
+    [(dataset, group_num, base_df, edited_df, done)] = save.calls
+    assert (dataset, group_num, done) == ("ds", 1, True)
+    assert base_df["text"][0] == "a"
+    assert edited_df["text"][0] == "b"
+    assert saved == [("ds", 1)]
+    assert queue.status() == {"pending": 0, "failed": []}
+
+
+def test_edited_frame_is_copied():
+    save = Recorder()
+    save.release.clear()
+    queue = SaveQueue(save)
+    edited = frame("b")
+
+    queue.enqueue("ds", 1, frame("a"), edited)
+    edited.loc[0, "text"] = "changed after enqueue"
+    save.release.set()
+
+    assert queue.flush(5)
+    assert save.calls[0][3]["text"][0] == "b"
+
+
+def test_waiting_saves_of_a_group_are_merged():
+    save = Recorder()
+    save.release.clear()
+    queue = SaveQueue(save)
+
+    # The first save runs and blocks, the next ones wait and are merged
+    queue.enqueue("ds", 1, frame("a"), frame("b"))
+    assert save.started.wait(5)
+    queue.enqueue("ds", 1, frame("b"), frame("c"))
+    queue.enqueue("ds", 1, frame("c"), frame("d"), done=True)
+    queue.enqueue("ds", 2, frame("x"), frame("y"))
+    save.release.set()
+
+    assert queue.flush(5)
+    saves = [
+        (group_num, base_df["text"][0], edited_df["text"][0], done)
+        for _, group_num, base_df, edited_df, done in save.calls
+    ]
+    assert saves[0] == (1, "a", "b", False)
+    # The merged save keeps the oldest base and the newest edits
+    assert sorted(saves[1:]) == [(1, "b", "d", True), (2, "x", "y", False)]
+
+
+def test_failing_save_is_reported_after_its_retries():
+    save = Recorder(failing=True)
+    queue = SaveQueue(save, retries=3, backoff=0.01, max_backoff=0.01)
+
+    queue.enqueue("ds", 1, frame("a"), frame("b"))
+
+    assert queue.flush(5)
+    assert len(save.calls) == 3
+    [(dataset, group_num, error)] = queue.status()["failed"]
+    assert (dataset, group_num) == ("ds", 1)
+    assert isinstance(error, IOError)
+
+    save.failing = False
+    queue.retry_failed()
+    assert queue.flush(5)
+    assert len(save.calls) == 4
+    assert queue.status() == {"pending": 0, "failed": []}
+
+
+def test_newer_edits_keep_the_retry_count_of_a_failing_save():
+    save = Recorder(failing=True)
+    queue = SaveQueue(save, retries=2, backoff=0.5, max_backoff=0.5)
+
+    queue.enqueue("ds", 1, frame("a"), frame("b"))
+    assert save.called.wait(5)
+    # Edited again while the failed save waits for its retry
+    queue.enqueue("ds", 1, frame("b"), frame("c"))
+
+    assert queue.flush(5)
+    assert len(save.calls) == 2
+    assert len(queue.status()["failed"]) == 1
+    # The retry holds both edits
+    _, _, base_df, edited_df, _ = save.calls[-1]
+    assert (base_df["text"][0], edited_df["text"][0]) == ("a", "c")
+
+
+def test_new_edits_retry_a_failed_save():
+    save = Recorder(failing=True)
+    queue = SaveQueue(save, retries=1, backoff=0.01, max_backoff=0.01)
+    queue.enqueue("ds", 1, frame("a"), frame("b"))
+    assert queue.flush(5)
+    assert len(queue.status()["failed"]) == 1
+
+    save.failing = False
+    queue.enqueue("ds", 1, frame("b"), frame("c"))
+
+    assert queue.flush(5)
+    assert queue.status() == {"pending": 0, "failed": []}
+    _, _, base_df, edited_df, _ = save.calls[-1]
+    # No edit is dropped: the failed edits are saved with the new ones
+    assert (base_df["text"][0], edited_df["text"][0]) == ("a", "c")
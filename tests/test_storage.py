@@ -0,0 +1,119 @@
+import pytest
+
+from database.storage import (
+    ConflictError,
+    LocalStorage,
+    MemoryStorage,
+    create_storage,
+    md5_base64,
+)
+
+
+@pytest.fixture(params=["memory", "local"])
+def backend(request, tmp_path):
+    if request.param == "memory":
+        return MemoryStorage()
+    return LocalStorage(str(tmp_path / "bucket"))
+
+
+def test_write_read_stat(backend):
+    info = backend.write(
+        "csv_files/ds/group_1.csv",
+        b"a,b\n1,2\n",
+        content_type="text/csv",
+        metadata={"row_count": "1"},
+    )
+
+    assert backend.read("csv_files/ds/group_1.csv") == b"a,b\n1,2\n"
+    stat = backend.stat("csv_files/ds/group_1.csv")
+    assert stat.generation == info.generation
+    assert stat.size == 8
+    assert stat.md5_hash == md5_base64(b"a,b\n1,2\n")
+    assert stat.content_type == "text/csv"
+    assert stat.metadata == {"row_count": "1"}
+
+
+def test_missing_blob(backend):
+    assert backend.read("csv_files/ds/missing.csv") is None
+    assert backend.stat("csv_files/ds/missing.csv") is None
+    assert not backend.exists("csv_files/ds/missing.csv")
+    # Deleting a missing blob is not an error
+    backend.delete("csv_files/ds/missing.csv")
+
+
+def test_generation_changes_on_every_write(backend):
+    first = backend.write("csv_files/ds/group_1.csv", b"1")
+    second = backend.write("csv_files/ds/group_1.csv", b"2")
+
+    assert second.generation != first.generation
+    assert backend.read("csv_files/ds/group_1.csv") == b"2"
+
+
+def test_conditional_write(backend):
+    info = backend.write("csv_files/ds/group_1.csv", b"1", if_generation_match=0)
+
+    # 0: the blob must not exist yet
+    with pytest.raises(ConflictError):
+        backend.write("csv_files/ds/group_1.csv", b"2", if_generation_match=0)
+    # An outdated generation is rejected and the blob is kept
+    backend.write("csv_files/ds/group_1.csv", b"2", if_generation_match=info.generation)
+    with pytest.raises(ConflictError):
+        backend.write(
+            "csv_files/ds/group_1.csv", b"3", if_generation_match=info.generation
+        )
+    assert backend.read("csv_files/ds/group_1.csv") == b"2"
+
+
+def test_list_blobs_and_dir(backend):
+    for path in [
+        "csv_files/ds/group_1.csv",
+        "csv_files/ds/group_2.csv",
+        "csv_files/other/group_1.csv",
+        "audio_files/ds/utt_0.wav",
+    ]:
+        backend.write(path, b"x")
+
+    names = [blob.name for blob in backend.list_blobs(prefix="csv_files/")]
+    assert names == [
+        "csv_files/ds/group_1.csv",
+        "csv_files/ds/group_2.csv",
+        "csv_files/other/group_1.csv",
+    ]
+
+    blobs, prefixes = backend.list_dir("csv_files/")
+    assert blobs == []
+    assert prefixes == ["csv_files/ds/", "csv_files/other/"]
+
+    blobs, prefixes = backend.list_dir("csv_files/ds/")
+    assert [blob.name for blob in blobs] == [
+        "csv_files/ds/group_1.csv",
+        "csv_files/ds/group_2.csv",
+    ]
+    assert prefixes == []
+
+
+def test_delete(backend):
+    backend.write("csv_files/ds/group_1.csv", b"1")
+    backend.delete("csv_files/ds/group_1.csv")
+
+    assert not backend.exists("csv_files/ds/group_1.csv")
+    assert list(backend.list_blobs(prefix="csv_files/")) == []
+
+
+def test_local_storage_is_shared_between_instances(tmp_path):
+    LocalStorage(str(tmp_path)).write("csv_files/ds/group_1.csv", b"1")
+    other = LocalStorage(str(tmp_path))
+
+    assert other.read("csv_files/ds/group_1.csv") == b"1"
+    assert other.cache_id == LocalStorage(str(tmp_path)).cache_id
+
+
+def test_memory_storages_never_share_cache_ids():
+    assert MemoryStorage().cache_id != MemoryStorage().cache_id
+
+
+def test_create_storage(tmp_path):
+    assert isinstance(create_storage("memory"), MemoryStorage)
+    assert isinstance(create_storage("local", str(tmp_path)), LocalStorage)
+    with pytest.raises(ValueError):
+        create_storage("ftp")
@@ -0,0 +1,175 @@
+import pandas as pd
+import pytest
+
+import database.storage
+from database import (
+    dataset_format,
+    get_manifest,
+    load_group,
+    read_dataset_file,
+    save_group_edits,
+    upload_audio_files,
+    upload_csv_files,
+)
+from database.storage import MemoryStorage, get_storage
+
+
+def dataset_files(dataset="ds"):
+    return sorted(
+        blob.name.rsplit("/", 1)[-1]
+        for blob in get_storage().list_blobs(prefix=f"csv_files/{dataset}/")
+    )
+
+
+@pytest.mark.parametrize("file_format", ["csv", "parquet"])
+def test_upload_formats(make_dataset, file_format):
+    upload_csv_files(make_dataset(), 50, file_format=file_format)
+
+    extension = ".csv" if file_format == "csv" else ".parquet"
+    assert dataset_files() == [f"group_{i}{extension}" for i in range(1, 5)] + [
+        "manifest.json",
+        f"train{extension}",
+        f"val{extension}",
+    ]
+    manifest = get_manifest("ds")
+    assert manifest["format"] == file_format
+    assert manifest["splits"] == {"train": 120, "val": 37}
+    assert [manifest["groups"][str(i)]["rows"] for i in range(1, 5)] == [50] * 3 + [7]
+
+    group, _ = load_group("ds", 2)
+    assert group["text"].iloc[0] == "sentence 50"
+    train, _ = read_dataset_file("ds", "train", columns=["text"])
+    assert list(train.columns) == ["text"]
+    assert len(train) == 120
+
+
+@pytest.mark.parametrize("file_format", ["csv", "parquet"])
+def test_load_group_columns(make_dataset, file_format):
+    upload_csv_files(make_dataset(), 50, file_format=file_format)
+    base, _ = load_group("ds", 1)
+    edited = base.copy()
+    edited.loc[2, "text"] = "edited"
+    edited.loc[2, "unclear"] = True
+    save_group_edits("ds", 1, base, edited)
+
+    group, _ = load_group("ds", 1, columns=["full_path", "text", "missing"])
+
+    assert sorted(group.columns) == ["full_path", "text"]
+    assert group.loc[2, "text"] == "edited"
+
+
+def test_dataset_format_comes_from_the_manifest(make_dataset, storage, monkeypatch):
+    upload_csv_files(make_dataset(), 50, file_format="parquet")
+
+    def exists(path):
+        raise AssertionError(f"{path} probed")
+
+    monkeypatch.setattr(storage, "exists", exists)
+    assert dataset_format("ds") == "parquet"
+    assert load_group("ds", 1)[0] is not None
+
+
+def test_legacy_dataset_format_is_probed(storage):
+    storage.write("csv_files/old/train.parquet", b"")
+    storage.write("csv_files/legacy/train.csv", b"")
+
+    assert dataset_format("old") == "parquet"
+    assert dataset_format("legacy") == "csv"
+
+
+@pytest.mark.parametrize("chunk_size", [None, 40])
+def test_dry_run_keeps_every_file(make_dataset, chunk_size):
+    folder = make_dataset()
+    upload_csv_files(folder, 50)
+    before = {
+        blob.name: blob.generation
+        for blob in get_storage().list_blobs(prefix="csv_files/ds/")
+    }
+
+    upload_csv_files(
+        folder,
+        50,
+        sync=True,
+        dry_run=True,
+        file_format="parquet",
+        chunk_size=chunk_size,
+    )
+
+    after = {
+        blob.name: blob.generation
+        for blob in get_storage().list_blobs(prefix="csv_files/ds/")
+    }
+    assert after == before
+
+
+@pytest.mark.parametrize("chunk_size", [None, 40])
+def test_format_change_replaces_the_old_files(make_dataset, chunk_size):
+    folder = make_dataset()
+    upload_csv_files(folder, 50)
+
+    upload_csv_files(folder, 50, file_format="parquet", chunk_size=chunk_size)
+
+    assert dataset_files() == [f"group_{i}.parquet" for i in range(1, 5)] + [
+        "manifest.json",
+        "train.parquet",
+        "val.parquet",
+    ]
+    assert get_manifest("ds")["format"] == "parquet"
+
+
+def test_failed_upload_keeps_the_old_files(make_dataset, storage, monkeypatch):
+    folder = make_dataset()
+    upload_csv_files(folder, 50)
+    write = storage.write
+
+    def failing_write(path, *args, **kwargs):
+        if path.endswith("group_2.parquet"):
+            raise IOError("upload failed")
+        return write(path, *args, **kwargs)
+
+    monkeypatch.setattr(storage, "write", failing_write)
+    upload_csv_files(folder, 50, file_format="parquet")
+
+    assert {f"group_{i}.csv" for i in range(1, 5)} <= set(dataset_files())
+    assert get_manifest("ds")["format"] == "csv"
+    assert load_group("ds", 2)[0]["text"].iloc[0] == "sentence 50"
+
+
+def ingest(folder, monkeypatch, **kwargs):
+    # Upload the dataset into a fresh bucket and return its groups and manifest
+    monkeypatch.setattr(database.storage, "_storage", MemoryStorage())
+    upload_audio_files(f"{folder}/ds")
+    upload_csv_files(folder, 50, **kwargs)
+    manifest = get_manifest("ds")
+    groups = {int(i): load_group("ds", int(i))[0] for i in manifest["groups"]}
+    return groups, manifest
+
+
+@pytest.mark.parametrize("file_format", ["csv", "parquet"])
+@pytest.mark.parametrize("chunk_size", [7, 50, 1000])
+def test_chunked_ingest_matches_whole_file_ingest(
+    make_dataset, monkeypatch, file_format, chunk_size
+):
+    folder = make_dataset()
+    whole, whole_manifest = ingest(folder, monkeypatch, file_format=file_format)
+    chunked, chunked_manifest = ingest(
+        folder, monkeypatch, file_format=file_format, chunk_size=chunk_size
+    )
+
+    assert sorted(chunked) == sorted(whole) == [1, 2, 3, 4]
+    for group_num, df in whole.items():
+        # Download links embed a per-upload token
+        assert chunked[group_num]["audio_link"].notna().all()
+        pd.testing.assert_frame_equal(
+            chunked[group_num].drop(columns="audio_link").reset_index(drop=True),
+            df.drop(columns="audio_link").reset_index(drop=True),
+        )
+    assert chunked_manifest["splits"] == whole_manifest["splits"]
+    assert chunked_manifest["format"] == file_format
+    for group_num, entry in whole_manifest["groups"].items():
+        for field in ["rows", "edit_status", "flags"]:
+            assert chunked_manifest["groups"][group_num][field] == entry[field]
+
+    train, _ = read_dataset_file("ds", "train")
+    assert len(train) == 120
+    assert train["group"].max() == 3